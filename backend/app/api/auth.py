@@ -2,12 +2,33 @@
 Authentication utilities for PainAR API endpoints.
 """
 
+import hmac
+
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.settings import settings
 
 security = HTTPBearer()
 
+# Authorization header scheme prefix for bearer tokens
+BEARER_PREFIX = "Bearer "
+
+# Dev token encoded once for constant-time comparisons
+DEV_TOKEN_BYTES = settings.dev_token.encode("utf-8")
+
+
+def is_dev_token(token: str) -> bool:
+    """
+    Check a token against the configured DEV_TOKEN in constant time.
+    
+    Args:
+        token: Bearer token supplied by the client
+        
+    Returns:
+        True if the token matches the dev token
+    """
+    return hmac.compare_digest(token.encode("utf-8"), DEV_TOKEN_BYTES)
+
 
 async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
     """
@@ -28,7 +49,7 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Security(secu
     token = credentials.credentials
     
     # For development, check against dev token
-    if token == settings.dev_token:
+    if is_dev_token(token):
         return token
     
     # In production, implement proper token validation here
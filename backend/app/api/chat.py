@@ -6,25 +6,86 @@ and streams assistant responses using server-sent events for real-time interacti
 Includes comprehensive injury assessment capabilities.
 """
 
-import json
-from typing import AsyncGenerator, Optional
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any, AsyncGenerator, AsyncIterator, Coroutine, Optional
 from uuid import UUID, uuid4
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, StringConstraints
+from sqlalchemy import cast, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sse_starlette.sse import EventSourceResponse
+from typing_extensions import TypedDict
 
-from app.db.core import get_session
+from app.api.auth import BEARER_PREFIX, is_dev_token
+from app.db.core import AsyncSessionLocal, get_session
 from app.db.models import Embedding, Message, MessageRole, Thread
-from app.db.vector import PGVectorRetriever
-from app.services.rag import build_chain
+from app.services.assessment_store import assessment_store
+from app.services.embeddings import embed_text
+from app.services.http_client import http_client
+from app.services.rag import get_chain, stream_chain_tokens
+from app.services.semantic_cache import semantic_cache
 from app.settings import settings
 from app.prompts import assessment_manager, injury_assessment
 
+logger = logging.getLogger(__name__)
+
 # Create router for chat endpoints
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(
+    prefix="/chat",
+    tags=["chat"],
+    default_response_class=ORJSONResponse
+)
+
+# Fixed server-sent event framing; only the JSON-encoded payload varies.
+# Pre-encoded frames are passed through EventSourceResponse unchanged.
+SSE_CONTENT_PREFIX = b'data: {"content": '
+SSE_ERROR_PREFIX = b'data: {"error": '
+SSE_FRAME_SUFFIX = b"}\n\n"
+SSE_DONE_EVENT = b"event: done\ndata: {}\n\n"
+SSE_PING_INTERVAL_SECONDS = 15
+
+# Streamed tokens are grouped into one event per interval (or once enough
+# text is buffered) to cut per-event framing, send and TLS record overhead
+SSE_COALESCE_INTERVAL_SECONDS = 0.05
+SSE_COALESCE_MAX_CHARS = 256
+
+# Strong references to in-flight background writes so they are not
+# garbage collected before completion
+_background_tasks: set[asyncio.Task] = set()
+
+# Minimum gap between a question and its reply, so the reply still sorts
+# after the question when both are stamped within the same clock tick
+REPLY_TIMESTAMP_OFFSET = timedelta(microseconds=1)
+
+# System message for direct LLM calls without assessment guidance
+BASE_SYSTEM_MESSAGE = SystemMessage(content=injury_assessment.system_prompt)
+
+# Shared client for direct LLM calls, e.g. when the RAG chain is unavailable
+fallback_llm = ChatOpenAI(
+    model_name=settings.model_name,
+    openai_api_key=settings.openai_api_key,
+    openai_api_base=settings.llm_base_url,
+    temperature=0.7,
+    max_tokens=512,
+    http_async_client=http_client
+)
+
+
+# User message text: surrounding whitespace is stripped and empty or
+# oversized messages are rejected before any database or LLM work
+MAX_MESSAGE_CHARS = 8000
+MessageText = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, min_length=1, max_length=MAX_MESSAGE_CHARS)
+]
 
 
 class PainArea(BaseModel):
@@ -35,9 +96,17 @@ class PainArea(BaseModel):
     y: float
 
 
+class PathPoint(TypedDict):
+    """Single x,y coordinate of a drawn path."""
+    x: float
+    y: float
+
+
 class DrawingData(BaseModel):
     """Model for drawing path data."""
-    path_points: list[dict]  # List of x,y coordinates
+    # Typed dicts are validated entirely in pydantic-core without building
+    # a model instance per point, which matters for long drawn paths
+    path_points: list[PathPoint]
     pain_level: int
     body_parts_affected: list[str]
 
@@ -45,7 +114,7 @@ class DrawingData(BaseModel):
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     thread_id: Optional[UUID] = None
-    message: str
+    message: MessageText
     svg_path: Optional[str] = None
     pain_areas: Optional[list[PainArea]] = None
     drawing_data: Optional[list[DrawingData]] = None
@@ -53,7 +122,7 @@ class ChatRequest(BaseModel):
 
 class SimpleChatRequest(BaseModel):
     """Simple request model for basic chat."""
-    message: str
+    message: MessageText
     thread_id: Optional[str] = None
 
 
@@ -84,13 +153,14 @@ def verify_auth_token(request: Request) -> bool:
     if not auth_header:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
     
-    if not auth_header.startswith("Bearer "):
+    if not auth_header.startswith(BEARER_PREFIX):
         raise HTTPException(status_code=401, detail="Invalid Authorization header format")
     
-    token = auth_header.replace("Bearer ", "")
+    # Strip only the leading scheme; the token itself is left untouched
+    token = auth_header[len(BEARER_PREFIX):].strip()
     
     # In debug mode, accept the dev token
-    if settings.debug and token == settings.dev_token:
+    if settings.debug and is_dev_token(token):
         return True
     
     # TODO: Implement proper token validation for production
@@ -98,92 +168,554 @@ def verify_auth_token(request: Request) -> bool:
     raise HTTPException(status_code=401, detail="Invalid authentication token")
 
 
+def build_system_message(prompt_additions: list[str]) -> SystemMessage:
+    """
+    Build the system message for a direct LLM call.
+    
+    Args:
+        prompt_additions: Assessment guidance to append to the base prompt
+        
+    Returns:
+        The shared base system message, or a new one with the additions
+    """
+    if not prompt_additions:
+        return BASE_SYSTEM_MESSAGE
+    
+    return SystemMessage(
+        content=injury_assessment.system_prompt + "".join(prompt_additions)
+    )
+
+
+def build_pain_context(chat_request: ChatRequest) -> str:
+    """
+    Describe the marked pain areas and drawings for the LLM.
+    
+    Args:
+        chat_request: Chat request with optional pain areas and drawing data
+        
+    Returns:
+        Pain context to append to the user message, or an empty string
+    """
+    pain_context_parts = []
+    if chat_request.pain_areas:
+        pain_context_parts.append("\n\nCurrent Pain Assessment Data:\n")
+        pain_context_parts.extend(
+            f"- {pain_area.body_part}: Pain level {pain_area.pain_level}/10\n"
+            for pain_area in chat_request.pain_areas
+        )
+        pain_context_parts.append("\nPlease reference these specific areas in your response and ask relevant follow-up questions about these marked regions.")
+    
+    if chat_request.drawing_data:
+        pain_context_parts.append("\n\nUser has drawn pain areas on the body diagram with the following information:\n")
+        pain_context_parts.extend(
+            f"- Drawn area affecting: {', '.join(drawing.body_parts_affected)} (Pain level: {drawing.pain_level}/10)\n"
+            for drawing in chat_request.drawing_data
+        )
+        pain_context_parts.append("\nUse this visual pain mapping to ask more targeted questions about the specific anatomical regions marked.")
+    
+    return "".join(pain_context_parts)
+
+
+async def build_assessment_messages(
+    session_id: str,
+    user_message: str,
+    pain_context: str = ""
+) -> list[BaseMessage]:
+    """
+    Advance the injury assessment and build the messages for a direct LLM call.
+    
+    Starts a new assessment for unknown sessions, otherwise records the
+    message as a response, and appends the resulting guidance to the
+    system prompt. The update runs through the shared assessment store, so
+    concurrent requests for the same session on different workers do not
+    overwrite each other.
+    
+    Args:
+        session_id: Assessment session identifier
+        user_message: The user's message
+        pain_context: Optional pain area context appended to the user message
+        
+    Returns:
+        System and human messages for the LLM
+    """
+    def advance_assessment() -> list[str]:
+        # Assessment guidance appended to the base system prompt
+        prompt_additions = []
+        
+        # Check if this is a new conversation that should start an assessment
+        is_new_assessment = session_id not in assessment_manager.active_assessments
+        
+        if is_new_assessment:
+            # Start a new assessment
+            assessment_manager.start_assessment(
+                user_id="current_user",  # In a real app, get from authentication
+                session_id=session_id,
+                initial_complaint=user_message
+            )
+        
+            # Get the first assessment question
+            next_question = assessment_manager.get_next_question(session_id)
+            if next_question:
+                prompt_additions.append(f"\n\nFIRST ASSESSMENT QUESTION TO ASK: {next_question}")
+        else:
+            # Continue existing assessment
+            # Try to identify which question was just answered
+            current_assessment = assessment_manager.active_assessments.get(session_id)
+            if current_assessment and current_assessment.responses:
+                # Process the latest response (this is a simplified approach)
+                # In a real implementation, you'd track which question was asked
+                last_question_id = "general_response"  # Placeholder
+                result = assessment_manager.process_response(
+                    session_id, last_question_id, user_message
+                )
+                
+                if result.get("follow_up"):
+                    prompt_additions.append(f"\n\nFOLLOW-UP QUESTION: {result['follow_up']}")
+                elif result.get("next_question"):
+                    prompt_additions.append(f"\n\nNEXT ASSESSMENT QUESTION: {result['next_question']}")
+                
+                # Add assessment progress
+                completion = result.get("completion_percentage", 0)
+                prompt_additions.append(f"\n\nASSESSMENT PROGRESS: {completion:.1f}% complete")
+        
+        return prompt_additions
+    
+    prompt_additions = await assessment_store.update(session_id, advance_assessment)
+    
+    # Create the human message with context
+    human_message_content = user_message
+    if pain_context:
+        human_message_content = f"{user_message}\n{pain_context}"
+    
+    return [
+        build_system_message(prompt_additions),
+        HumanMessage(content=human_message_content)
+    ]
+
+
+def reply_timestamp(asked_at: datetime) -> datetime:
+    """
+    Timestamp for an assistant reply that orders after its question.
+    
+    Messages are stamped by the application rather than by the column
+    default, because now() is fixed at the start of the transaction and
+    would give both messages of an exchange the same created_at.
+    
+    Args:
+        asked_at: Timestamp of the user's message
+        
+    Returns:
+        The current time, but at least REPLY_TIMESTAMP_OFFSET after asked_at
+    """
+    return max(datetime.now(timezone.utc), asked_at + REPLY_TIMESTAMP_OFFSET)
+
+
+async def ensure_thread(session: AsyncSession, thread_id: UUID) -> None:
+    """
+    Create the chat thread if it does not exist yet.
+    
+    Uses a single INSERT ... ON CONFLICT DO NOTHING statement instead of a
+    SELECT followed by a conditional INSERT.
+    
+    Args:
+        session: Database session
+        thread_id: Thread identifier
+    """
+    statement = pg_insert(Thread).values(
+        id=thread_id,
+        title=f"Chat {thread_id}"
+    ).on_conflict_do_nothing(index_elements=["id"])
+    await session.execute(statement)
+
+
+async def thread_has_history(session: AsyncSession, thread_id: UUID) -> bool:
+    """
+    Check whether a thread already has stored messages.
+    
+    Answers in a thread with history depend on that history, so they must
+    not be served from or added to the process-wide semantic cache.
+    
+    Args:
+        session: Database session
+        thread_id: Thread identifier
+        
+    Returns:
+        True if at least one message exists for the thread
+    """
+    result = await session.execute(
+        select(Message.id).where(Message.thread_id == thread_id).limit(1)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def embed_query(query: str) -> Optional[list[float]]:
+    """
+    Embed a question for the semantic cache.
+    
+    The semantic cache is an optimization only, so embedding failures are
+    logged and the question is simply not looked up or cached.
+    
+    Args:
+        query: User's input query
+        
+    Returns:
+        The query embedding, or None if it could not be computed
+    """
+    try:
+        return await embed_text(query)
+    except Exception as e:
+        logger.warning(f"Semantic cache skipped, embedding failed: {e}")
+        return None
+
+
+def start_query_embedding(query: str) -> asyncio.Task:
+    """
+    Start embedding a question for the semantic cache in the background.
+    
+    Args:
+        query: User's input query
+        
+    Returns:
+        Task resolving to the query embedding or None
+    """
+    return run_in_background(embed_query(query))
+
+
+async def find_cached_answer(query_embedding: asyncio.Task) -> Optional[str]:
+    """
+    Look up a previously generated answer for a near-duplicate question.
+    
+    Waits at most the configured probe timeout for the embedding, so a slow
+    embeddings call adds a bounded delay before the LLM is called instead
+    of one LLM request being started and then cancelled on every hit. If
+    the question is not embedded in time, the lookup is skipped and the
+    caller runs the chain.
+    
+    Args:
+        query_embedding: Task from start_query_embedding
+        
+    Returns:
+        The cached answer, or None on a miss
+    """
+    done, _ = await asyncio.wait(
+        {query_embedding},
+        timeout=settings.semantic_cache_probe_timeout_ms / 1000
+    )
+    if not done or query_embedding.result() is None:
+        return None
+    
+    return semantic_cache.probe(query_embedding.result(), settings.semantic_cache_threshold)
+
+
+async def cache_answer(query_embedding: asyncio.Task, answer: str) -> None:
+    """
+    Add a generated answer to the semantic cache once its question is embedded.
+    
+    Args:
+        query_embedding: Task from start_query_embedding
+        answer: Assistant answer to the question
+    """
+    query_vector = await query_embedding
+    if query_vector is not None:
+        semantic_cache.insert(query_vector, answer)
+
+
+async def remember_cached_exchange(thread_id: UUID, query: str, answer: str) -> None:
+    """
+    Record an exchange served from the semantic cache in the chain's memory.
+    
+    The chain only saves exchanges it ran itself, so without this a cached
+    answer would be missing when the thread's next question is condensed.
+    
+    Args:
+        thread_id: Thread identifier
+        query: User's input query
+        answer: Cached assistant answer
+    """
+    try:
+        chain = get_chain(thread_id)
+        await asyncio.to_thread(
+            chain.memory.save_context, {"question": query}, {"answer": answer}
+        )
+    except Exception as e:
+        logger.warning(f"Failed to record cached answer for thread {thread_id}: {e}")
+
+
 async def store_message_with_embedding(
     session: AsyncSession,
     thread_id: UUID,
     role: MessageRole,
-    content: str
+    content: str,
+    embedding_vector: Optional[list[float]] = None,
+    created_at: Optional[datetime] = None
 ) -> UUID:
     """
     Store a message and its embedding in the database.
     
+    The message and its embedding are written by a single INSERT statement
+    with a data-modifying CTE, and committed together with any other
+    pending objects in the session.
+    
     Args:
         session: Database session
         thread_id: Thread identifier
         role: Message role (system, user, assistant)
         content: Message content
+        embedding_vector: Precomputed embedding for the content, if available
+        created_at: Message timestamp; defaults to the current time
         
     Returns:
         UUID of the created message
     """
-    # Create and store the message
-    message = Message(
+    message_id = uuid4()
+    
+    # Generate the embedding before touching the session
+    if embedding_vector is None:
+        embedding_vector = await embed_text(content)
+    
+    # Insert both rows in one statement:
+    # WITH new_message AS (INSERT INTO messages ... RETURNING id)
+    # INSERT INTO embeddings ... SELECT ... FROM new_message
+    new_message = insert(Message).values(
+        id=message_id,
         thread_id=thread_id,
         role=role,
-        content=content
+        content=content,
+        created_at=created_at or datetime.now(timezone.utc)
+    ).returning(Message.id).cte("new_message")
+    
+    embedding_columns = Embedding.__table__.c
+    statement = insert(Embedding).from_select(
+        ["id", "message_id", "vector"],
+        select(
+            literal(uuid4(), embedding_columns.id.type),
+            new_message.c.id,
+            cast(embedding_vector, embedding_columns.vector.type)
+        )
     )
-    session.add(message)
+    await session.execute(statement)
     await session.commit()
-    await session.refresh(message)
     
-    # Generate and store embedding for the message
-    vector_retriever = PGVectorRetriever(session)
-    embedding_vector = await vector_retriever.embeddings.aembed_query(content)
+    return message_id
+
+
+async def persist_chat_exchange(
+    thread_id: UUID,
+    user_content: str,
+    assistant_content: str,
+    asked_at: datetime
+) -> None:
+    """
+    Persist a streamed chat exchange using a dedicated database session.
     
-    embedding = Embedding(
-        message_id=message.id,
-        vector=embedding_vector
-    )
-    session.add(embedding)
-    await session.commit()
+    Runs as a background task after the response has been streamed, so the
+    thread upsert, both messages and the assistant embedding are written in
+    one commit without holding the client connection open. The user's
+    message is stored even when the reply is empty, e.g. because the
+    client disconnected or the LLM failed before the first token.
     
-    return message.id
+    Args:
+        thread_id: Thread identifier
+        user_content: The user's message
+        assistant_content: The assistant reply, possibly partial or empty
+        asked_at: When the user's message was received
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            await ensure_thread(session, thread_id)
+            session.add(Message(
+                id=uuid4(),
+                thread_id=thread_id,
+                role=MessageRole.USER,
+                content=user_content,
+                created_at=asked_at
+            ))
+            if assistant_content:
+                await store_message_with_embedding(
+                    session,
+                    thread_id,
+                    MessageRole.ASSISTANT,
+                    assistant_content,
+                    created_at=reply_timestamp(asked_at)
+                )
+            else:
+                await session.commit()
+    except Exception as e:
+        logger.error(f"Failed to persist chat exchange for thread {thread_id}: {e}")
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Schedule a coroutine as a background task that outlives the request.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The scheduled task
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def drain_background_tasks() -> None:
+    """Wait for in-flight background writes to finish, e.g. on shutdown."""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    interval: float = SSE_COALESCE_INTERVAL_SECONDS,
+    max_chars: int = SSE_COALESCE_MAX_CHARS
+) -> AsyncGenerator[str, None]:
+    """
+    Group streamed tokens into larger chunks.
+    
+    The first token is passed through immediately to keep time to first
+    token low; later tokens are buffered until the interval has elapsed
+    since the last chunk or max_chars are pending.
+    
+    Args:
+        tokens: Stream of text tokens
+        interval: Minimum seconds between chunks
+        max_chars: Buffered characters that force a chunk early
+        
+    Yields:
+        Concatenated token chunks
+    """
+    loop = asyncio.get_running_loop()
+    buffer: list[str] = []
+    buffered_chars = 0
+    last_flush: Optional[float] = None
+    
+    async for token in tokens:
+        buffer.append(token)
+        buffered_chars += len(token)
+        
+        now = loop.time()
+        if last_flush is None or buffered_chars >= max_chars or now - last_flush >= interval:
+            yield "".join(buffer)
+            buffer.clear()
+            buffered_chars = 0
+            last_flush = now
+    
+    if buffer:
+        yield "".join(buffer)
 
 
 async def stream_chat_response(
-    chain,
+    tokens: AsyncIterator[str],
     query: str,
-    session: AsyncSession,
-    thread_id: UUID
+    thread_id: UUID,
+    query_embedding: Optional[asyncio.Task] = None
 ) -> AsyncGenerator[bytes, None]:
     """
-    Stream chat response using the conversational retrieval chain.
+    Stream a chat response as server-sent events.
+    
+    Tokens are forwarded to the client as the LLM emits them, coalesced
+    into small time-based batches. The exchange is persisted in the
+    background once the stream ends, so the stream can close right after
+    the completion event. Streams cut short by a disconnect or an error
+    still persist the user's message and the partial reply.
     
     Args:
-        chain: Configured LangChain conversational retrieval chain
+        tokens: Answer tokens, e.g. from the conversational retrieval chain
         query: User's input query
-        session: Database session
         thread_id: Thread identifier
+        query_embedding: Optional query embedding task used to cache the answer
         
     Yields:
         Server-sent event formatted response chunks
     """
+    asked_at = datetime.now(timezone.utc)
+    chunks: list[str] = []
+    persisted = False
+    
     try:
-        # Run the chain and collect tokens
-        full_response = ""
-        
-        # TODO: Implement proper streaming with LangChain
-        # For now, we'll simulate streaming by chunking the response
-        result = await chain.ainvoke({"question": query})
-        response_text = result["answer"]
-        
-        # Simulate streaming by sending chunks
-        words = response_text.split()
-        for i, word in enumerate(words):
-            chunk = word + (" " if i < len(words) - 1 else "")
-            full_response += chunk
+        async for chunk in coalesce_tokens(tokens):
+            chunks.append(chunk)
             
             # Format as server-sent event
-            event_data = f"data: {json.dumps({'content': chunk})}\n\n"
-            yield event_data.encode("utf-8")
+            yield (
+                SSE_CONTENT_PREFIX
+                + orjson.dumps(chunk)
+                + SSE_FRAME_SUFFIX
+            )
+        
+        # Persist the exchange while the completion event is being flushed
+        full_response = "".join(chunks)
+        if full_response and query_embedding is not None:
+            run_in_background(cache_answer(query_embedding, full_response))
+        run_in_background(
+            persist_chat_exchange(thread_id, query, full_response, asked_at)
+        )
+        persisted = True
         
         # Send completion event
-        yield b"event: done\ndata: {}\n\n"
+        yield SSE_DONE_EVENT
         
     except Exception as e:
-        error_event = f"data: {json.dumps({'error': str(e)})}\n\n"
-        yield error_event.encode("utf-8")
+        yield (
+            SSE_ERROR_PREFIX
+            + orjson.dumps(str(e))
+            + SSE_FRAME_SUFFIX
+        )
         raise
+    
+    finally:
+        # A client disconnect or LLM error ends the stream early; keep the
+        # user's message and whatever part of the reply was generated
+        if not persisted:
+            run_in_background(
+                persist_chat_exchange(thread_id, query, "".join(chunks), asked_at)
+            )
+
+
+async def stream_llm_tokens(messages: list[BaseMessage]) -> AsyncIterator[str]:
+    """
+    Stream answer tokens from a direct LLM call.
+    
+    Args:
+        messages: Messages to send to the LLM
+        
+    Yields:
+        Non-empty answer tokens as they are generated
+    """
+    async for chunk in fallback_llm.astream(messages):
+        if chunk.content:
+            yield chunk.content
+
+
+async def stream_cached_response(
+    answer: str,
+    query: str,
+    thread_id: UUID
+) -> AsyncGenerator[bytes, None]:
+    """
+    Stream a previously generated answer served from the semantic cache.
+    
+    Args:
+        answer: Cached assistant answer
+        query: User's input query
+        thread_id: Thread identifier
+        
+    Yields:
+        Server-sent event formatted response chunks
+    """
+    run_in_background(
+        persist_chat_exchange(thread_id, query, answer, datetime.now(timezone.utc))
+    )
+    run_in_background(remember_cached_exchange(thread_id, query, answer))
+    
+    yield (
+        SSE_CONTENT_PREFIX
+        + orjson.dumps(answer)
+        + SSE_FRAME_SUFFIX
+    )
+    yield SSE_DONE_EVENT
 
 
 @router.post("/simple")
@@ -204,116 +736,79 @@ async def simple_chat(
     Returns:
         JSON response with the LLM's answer
     """
+    asked_at = datetime.now(timezone.utc)
+    
     try:
         # Generate thread_id if not provided
         thread_id = chat_request.thread_id or str(uuid4())
         thread_uuid = UUID(thread_id) if isinstance(thread_id, str) else thread_id
         
         # Ensure thread exists
-        thread_query = select(Thread).where(Thread.id == thread_uuid)
-        thread_result = await session.execute(thread_query)
-        thread = thread_result.scalar_one_or_none()
-        
-        if not thread:
-            # Create new thread
-            thread = Thread(
-                id=thread_uuid,
-                title=f"Chat {thread_uuid}"
-            )
-            session.add(thread)
-            await session.commit()
+        await ensure_thread(session, thread_uuid)
         
-        # Store user message
+        # Only answers to a thread's first question are shared through the
+        # semantic cache; later answers depend on the thread's history
+        use_cache = not await thread_has_history(session, thread_uuid)
+        
+        # Stage user message; it is committed together with the reply
         user_message = Message(
             id=uuid4(),
             thread_id=thread_uuid,
             role=MessageRole.USER,
-            content=chat_request.message
+            content=chat_request.message,
+            created_at=asked_at
         )
         session.add(user_message)
-        await session.commit()
         
         # Get LLM response using the RAG chain
         try:
-            chain = build_chain(thread_uuid, session)
+            # Probe the semantic cache before calling the LLM; the embedding
+            # wait is bounded, so a slow embedding only delays the chain
+            query_embedding, cached_answer = None, None
+            if use_cache:
+                query_embedding = start_query_embedding(chat_request.message)
+                cached_answer = await find_cached_answer(query_embedding)
             
-            # Run the chain with the user's question
-            result = await chain.ainvoke({
-                "question": chat_request.message,
-                "chat_history": []  # For now, start fresh each time
-            })
-            
-            # Extract the answer
-            llm_response = result.get("answer", "I'm sorry, I couldn't process your request at the moment.")
+            if cached_answer is not None:
+                llm_response = cached_answer
+                run_in_background(
+                    remember_cached_exchange(thread_uuid, chat_request.message, cached_answer)
+                )
+            else:
+                chain = get_chain(thread_uuid)
+                
+                # Run the chain with the user's question
+                result = await chain.ainvoke({
+                    "question": chat_request.message,
+                    "chat_history": []  # For now, start fresh each time
+                })
+                
+                # Extract the answer
+                llm_response = result.get("answer")
+                if llm_response:
+                    if query_embedding is not None:
+                        run_in_background(cache_answer(query_embedding, llm_response))
+                else:
+                    llm_response = "I'm sorry, I couldn't process your request at the moment."
             
         except Exception as e:
             # Fallback to direct OpenAI call if RAG chain fails
             print(f"⚠️ RAG chain failed, using direct OpenAI: {e}")
             
-            from langchain_openai import ChatOpenAI
-            
-            llm = ChatOpenAI(
-                model_name=settings.model_name,
-                openai_api_key=settings.openai_api_key,
-                temperature=0.7,
-                max_tokens=512
+            messages = await build_assessment_messages(
+                str(thread_uuid), chat_request.message
             )
             
-            # Create a comprehensive medical AI system prompt with structured assessment
-            from langchain.schema import SystemMessage, HumanMessage
-            
-            # Get the comprehensive system prompt from our assessment system
-            assessment_system_prompt = injury_assessment.system_prompt
-            
-            # Check if this is a new conversation that should start an assessment
-            session_id = str(thread_uuid)
-            is_new_assessment = session_id not in assessment_manager.active_assessments
-            
-            if is_new_assessment:
-                # Start a new assessment
-                assessment_manager.start_assessment(
-                    user_id="current_user",  # In a real app, get from authentication
-                    session_id=session_id,
-                    initial_complaint=chat_request.message
-                )
-                
-                # Get the first assessment question
-                next_question = assessment_manager.get_next_question(session_id)
-                if next_question:
-                    assessment_system_prompt += f"\n\nFIRST ASSESSMENT QUESTION TO ASK: {next_question}"
-            else:
-                # Continue existing assessment
-                # Try to identify which question was just answered
-                current_assessment = assessment_manager.active_assessments.get(session_id)
-                if current_assessment and current_assessment.responses:
-                    # Process the latest response (this is a simplified approach)
-                    # In a real implementation, you'd track which question was asked
-                    last_question_id = "general_response"  # Placeholder
-                    result = assessment_manager.process_response(
-                        session_id, last_question_id, chat_request.message
-                    )
-                    
-                    if result.get("follow_up"):
-                        assessment_system_prompt += f"\n\nFOLLOW-UP QUESTION: {result['follow_up']}"
-                    elif result.get("next_question"):
-                        assessment_system_prompt += f"\n\nNEXT ASSESSMENT QUESTION: {result['next_question']}"
-                    
-                    # Add assessment progress
-                    completion = result.get("completion_percentage", 0)
-                    assessment_system_prompt += f"\n\nASSESSMENT PROGRESS: {completion:.1f}% complete"
-            
-            messages = [SystemMessage(content=assessment_system_prompt)]
-            messages.append(HumanMessage(content=chat_request.message))
-            
-            response = await llm.ainvoke(messages)
+            response = await fallback_llm.ainvoke(messages)
             llm_response = response.content
         
-        # Store assistant message
+        # Store assistant message and commit the whole exchange at once
         assistant_message = Message(
             id=uuid4(),
             thread_id=thread_uuid,
             role=MessageRole.ASSISTANT,
-            content=llm_response
+            content=llm_response,
+            created_at=reply_timestamp(asked_at)
         )
         session.add(assistant_message)
         await session.commit()
@@ -344,123 +839,48 @@ async def chat_with_json_response(
     Returns:
         JSON response with the LLM's answer
     """
+    asked_at = datetime.now(timezone.utc)
+    
     try:
         # Generate thread_id if not provided
         thread_uuid = chat_request.thread_id or uuid4()
         
         # Ensure thread exists
-        thread_query = select(Thread).where(Thread.id == thread_uuid)
-        thread_result = await session.execute(thread_query)
-        thread = thread_result.scalar_one_or_none()
-        
-        if not thread:
-            # Create new thread
-            thread = Thread(
-                id=thread_uuid,
-                title=f"Chat {thread_uuid}"
-            )
-            session.add(thread)
-            await session.commit()
+        await ensure_thread(session, thread_uuid)
         
-        # Store user message
+        # Stage user message; it is committed together with the reply
         user_message = Message(
             id=uuid4(),
             thread_id=thread_uuid,
             role=MessageRole.USER,
-            content=chat_request.message
+            content=chat_request.message,
+            created_at=asked_at
         )
         session.add(user_message)
-        await session.commit()
         
         # Get LLM response with pain data context
         try:
-            # Fallback to direct OpenAI call with pain context
-            from langchain_openai import ChatOpenAI
-            
-            llm = ChatOpenAI(
-                model_name=settings.model_name,
-                openai_api_key=settings.openai_api_key,
-                temperature=0.7,
-                max_tokens=512
+            # Direct OpenAI call with pain context
+            messages = await build_assessment_messages(
+                str(thread_uuid),
+                chat_request.message,
+                build_pain_context(chat_request)
             )
             
-            # Create a comprehensive medical AI system prompt
-            from langchain.schema import SystemMessage, HumanMessage
-            
-            # Get the comprehensive system prompt from our assessment system
-            assessment_system_prompt = injury_assessment.system_prompt
-            
-            # Check if this is a new conversation that should start an assessment
-            session_id = str(thread_uuid)
-            is_new_assessment = session_id not in assessment_manager.active_assessments
-            
-            if is_new_assessment:
-                # Start a new assessment
-                assessment_manager.start_assessment(
-                    user_id="current_user",  # In a real app, get from authentication
-                    session_id=session_id,
-                    initial_complaint=chat_request.message
-                )
-                
-                # Get the first assessment question
-                next_question = assessment_manager.get_next_question(session_id)
-                if next_question:
-                    assessment_system_prompt += f"\n\nFIRST ASSESSMENT QUESTION TO ASK: {next_question}"
-            else:
-                # Continue existing assessment
-                current_assessment = assessment_manager.active_assessments.get(session_id)
-                if current_assessment and current_assessment.responses:
-                    last_question_id = "general_response"  # Placeholder
-                    result = assessment_manager.process_response(
-                        session_id, last_question_id, chat_request.message
-                    )
-                    
-                    if result.get("follow_up"):
-                        assessment_system_prompt += f"\n\nFOLLOW-UP QUESTION: {result['follow_up']}"
-                    elif result.get("next_question"):
-                        assessment_system_prompt += f"\n\nNEXT ASSESSMENT QUESTION: {result['next_question']}"
-                    
-                    # Add assessment progress
-                    completion = result.get("completion_percentage", 0)
-                    assessment_system_prompt += f"\n\nASSESSMENT PROGRESS: {completion:.1f}% complete"
-            
-            messages = [SystemMessage(content=assessment_system_prompt)]
-            
-            # Add pain area context if available
-            pain_context = ""
-            if chat_request.pain_areas and len(chat_request.pain_areas) > 0:
-                pain_context += "\n\nCurrent Pain Assessment Data:\n"
-                for pain_area in chat_request.pain_areas:
-                    pain_context += f"- {pain_area.body_part}: Pain level {pain_area.pain_level}/10\n"
-                pain_context += "\nPlease reference these specific areas in your response and ask relevant follow-up questions about these marked regions."
-            
-            if chat_request.drawing_data and len(chat_request.drawing_data) > 0:
-                pain_context += "\n\nUser has drawn pain areas on the body diagram with the following information:\n"
-                for drawing in chat_request.drawing_data:
-                    affected_parts = ", ".join(drawing.body_parts_affected)
-                    pain_context += f"- Drawn area affecting: {affected_parts} (Pain level: {drawing.pain_level}/10)\n"
-                pain_context += "\nUse this visual pain mapping to ask more targeted questions about the specific anatomical regions marked."
-            
-            # Create the human message with context
-            human_message_content = chat_request.message
-            if pain_context:
-                human_message_content = f"{chat_request.message}\n{pain_context}"
-            
-            messages.append(HumanMessage(content=human_message_content))
-            
-            response = await llm.ainvoke(messages)
+            response = await fallback_llm.ainvoke(messages)
             llm_response = response.content
             
         except Exception as e:
             print(f"⚠️ LLM call failed: {e}")
             llm_response = "I'm sorry, I'm having trouble processing your request right now. Please try again."
         
-        # Store assistant message
+        # Store assistant message and commit the whole exchange at once
         assistant_message = Message(
             id=uuid4(),
             thread_id=thread_uuid,
             role=MessageRole.ASSISTANT,
-            content=llm_response
+            content=llm_response,
+            created_at=reply_timestamp(asked_at)
         )
         session.add(assistant_message)
         await session.commit()
@@ -474,27 +894,64 @@ async def chat_with_json_response(
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
 
+@router.post("/json/stream")
+async def chat_with_json_stream(chat_request: ChatRequest) -> EventSourceResponse:
+    """
+    Streaming variant of the JSON chat endpoint.
+    
+    Accepts the same request with pain data and builds the same assessment
+    prompt, but streams the reply as server-sent events so clients can
+    render it while it is generated. The exchange is persisted in the
+    background once the reply is complete.
+    
+    Args:
+        chat_request: Full chat request with message, pain areas, and drawing data
+        
+    Returns:
+        EventSourceResponse with server-sent events
+    """
+    try:
+        # Generate thread_id if not provided
+        thread_uuid = chat_request.thread_id or uuid4()
+        
+        messages = await build_assessment_messages(
+            str(thread_uuid),
+            chat_request.message,
+            build_pain_context(chat_request)
+        )
+        
+        response_stream = stream_chat_response(
+            stream_llm_tokens(messages),
+            chat_request.message,
+            thread_uuid
+        )
+        
+        return EventSourceResponse(
+            response_stream,
+            ping=SSE_PING_INTERVAL_SECONDS
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+
+
 @router.post("/")
-async def chat_endpoint(
-    chat_request: ChatRequest,
-    session: AsyncSession = Depends(get_session)
-) -> StreamingResponse:
+async def chat_endpoint(chat_request: ChatRequest) -> EventSourceResponse:
     """
     Chat endpoint that processes user messages and streams assistant responses.
     
     Workflow:
-    1. Store the user message and its embedding
-    2. Create or retrieve the conversational chain
-    3. Stream assistant tokens via server-sent events
-    4. Persist the assistant message and its embedding after streaming
-    5. Finish with an 'event: done' line
+    1. Create or retrieve the conversational chain
+    2. Stream assistant tokens via server-sent events
+    3. Finish with an 'event: done' line
+    4. Persist the thread, both messages and the reply embedding in a
+       background task with a single commit
     
     Args:
         chat_request: Chat request containing thread_id, message, and optional svg_path
-        session: Database session dependency
         
     Returns:
-        StreamingResponse with server-sent events
+        EventSourceResponse with server-sent events
     """
     # Skip authentication for now to make testing easier
     # verify_auth_token(request)
@@ -503,71 +960,41 @@ async def chat_endpoint(
         # Generate thread_id if not provided
         thread_uuid = chat_request.thread_id or uuid4()
         
-        # Ensure thread exists
-        thread_query = select(Thread).where(Thread.id == thread_uuid)
-        thread_result = await session.execute(thread_query)
-        thread = thread_result.scalar_one_or_none()
-        
-        if not thread:
-            # Create new thread if it doesn't exist
-            thread = Thread(
-                id=thread_uuid,
-                title=f"Chat {thread_uuid}"
-            )
-            session.add(thread)
-            await session.commit()
+        # Serve near-duplicate first questions from the semantic cache;
+        # answers in a thread with history depend on that history
+        use_cache = chat_request.thread_id is None
+        if not use_cache:
+            async with AsyncSessionLocal() as session:
+                use_cache = not await thread_has_history(session, thread_uuid)
         
-        # Store user message
-        user_message = Message(
-            id=uuid4(),
-            thread_id=thread_uuid,
-            role=MessageRole.USER,
-            content=chat_request.message
-        )
-        session.add(user_message)
-        await session.commit()
-        
-        # Build the conversational chain
-        chain = build_chain(chat_request.thread_id, session)
+        # The embedding wait is bounded, so a slow embedding adds at most the
+        # probe timeout to time to first token and never a cancelled LLM call
+        query_embedding, cached_answer = None, None
+        if use_cache:
+            query_embedding = start_query_embedding(chat_request.message)
+            cached_answer = await find_cached_answer(query_embedding)
         
-        # Create streaming response generator
-        async def generate_response():
-            full_response = ""
-            
-            # TODO: Implement proper streaming with LangChain
-            # For now, we'll simulate streaming by chunking a static response
-            response_text = "I understand you're experiencing pain. As a healthcare AI assistant, I recommend consulting with a medical professional for proper diagnosis and treatment options."
-            
-            # Simulate streaming by sending chunks
-            words = response_text.split()
-            for i, word in enumerate(words):
-                chunk = word + (" " if i < len(words) - 1 else "")
-                full_response += chunk
-                
-                # Format as server-sent event
-                event_data = f"data: {json.dumps({'content': chunk})}\n\n"
-                yield event_data.encode("utf-8")
-            
-            # Send completion event
-            yield b"event: done\ndata: {}\n\n"
-            
-            # Store assistant message and embedding after streaming
-            if full_response:
-                await store_message_with_embedding(
-                    session,
-                    chat_request.thread_id,
-                    MessageRole.ASSISTANT,
-                    full_response
-                )
+        if cached_answer is not None:
+            response_stream = stream_cached_response(
+                cached_answer,
+                chat_request.message,
+                thread_uuid
+            )
+        else:
+            # Build the conversational chain
+            chain = get_chain(thread_uuid)
+            response_stream = stream_chat_response(
+                stream_chain_tokens(chain, chat_request.message),
+                chat_request.message,
+                thread_uuid,
+                query_embedding
+            )
         
-        return StreamingResponse(
-            generate_response(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Disable Nginx buffering
-            }
+        # EventSourceResponse sends keep-alive pings, disables proxy buffering
+        # and cancels the stream (and the LLM call) when the client disconnects
+        return EventSourceResponse(
+            response_stream,
+            ping=SSE_PING_INTERVAL_SECONDS
         )
         
     except Exception as e:
@@ -590,6 +1017,7 @@ async def get_assessment_summary(
         Comprehensive assessment summary with key findings and recommendations
     """
     try:
+        await assessment_store.load(session_id)
         summary = assessment_manager.get_assessment_summary(session_id)
         
         if not summary:
@@ -623,6 +1051,7 @@ async def export_assessment(
         Formatted assessment report for healthcare providers
     """
     try:
+        await assessment_store.load(session_id)
         summary = assessment_manager.get_assessment_summary(session_id)
         
         if not summary:
@@ -2,19 +2,53 @@
 API endpoints for data ingestion into the RAG knowledge base.
 """
 
+import asyncio
+import shutil
 import uuid
 import tempfile
 from pathlib import Path
 from typing import List, Dict, Any, Optional
+import aiofiles
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from pydantic import BaseModel
+from sqlalchemy import delete, select
 
+from app.db.core import AsyncSessionLocal
+from app.db.models import Message, Embedding, Thread, MessageRole
+from app.services.document_parsing import SUPPORTED_EXTENSIONS
 from app.services.ingestion import DocumentIngestionService
+from app.services.ingestion_jobs import ingestion_jobs
 from app.api.auth import verify_token
 
 
 router = APIRouter(prefix="/ingestion", tags=["Data Ingestion"])
 
+# Bytes read from an upload per chunk when spooling it to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Shared ingestion service, created on first use by get_ingestion_service
+_service: Optional[DocumentIngestionService] = None
+_service_lock = asyncio.Lock()
+
+
+async def get_ingestion_service() -> DocumentIngestionService:
+    """
+    Dependency providing the shared document ingestion service.
+    
+    The service (embeddings client and text splitter) is built once on
+    first use instead of on every request.
+    
+    Returns:
+        DocumentIngestionService: Shared ingestion service
+    """
+    global _service
+    
+    if _service is None:
+        async with _service_lock:
+            if _service is None:
+                _service = DocumentIngestionService()
+    return _service
+
 
 class IngestionResponse(BaseModel):
     """Response model for ingestion operations."""
@@ -24,6 +58,16 @@ class IngestionResponse(BaseModel):
     chunks_created: int
 
 
+class IngestionJobResponse(BaseModel):
+    """Response model for a background ingestion job."""
+    job_id: str
+    status: str
+    filename: str
+    message_ids: List[str] = []
+    chunks_created: int = 0
+    error: Optional[str] = None
+
+
 class GuidelineData(BaseModel):
     """Model for medical guideline data."""
     title: str
@@ -37,72 +81,89 @@ class BulkGuidelinesRequest(BaseModel):
     guidelines: List[GuidelineData]
 
 
-@router.post("/upload-document", response_model=IngestionResponse)
+@router.post("/upload-document", response_model=IngestionJobResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     source_type: str = "knowledge_base",
     _: str = Depends(verify_token)
-) -> IngestionResponse:
+) -> IngestionJobResponse:
     """
-    Upload and ingest a single document file.
+    Upload a single document file and queue it for ingestion.
     
-    Supports PDF, TXT, CSV, JSON, and Markdown files.
+    Supports PDF, TXT, CSV, JSON, and Markdown files. The document is
+    parsed, embedded and stored in the background; poll
+    GET /ingestion/jobs/{job_id} for the result.
     """
     # Validate file type
-    allowed_extensions = {'.pdf', '.txt', '.csv', '.json', '.md'}
     file_extension = Path(file.filename).suffix.lower()
     
-    if file_extension not in allowed_extensions:
+    if file_extension not in SUPPORTED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
+            detail=f"Unsupported file type. Allowed: {', '.join(sorted(SUPPORTED_EXTENSIONS))}"
         )
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-        temp_path = Path(temp_file.name)
+    # Spool into a private temporary directory under the original file
+    # name, which the ingested thread's title is derived from
+    upload_dir = Path(tempfile.mkdtemp(prefix="painar-upload-"))
+    temp_path = upload_dir / Path(file.filename).name
+    
+    try:
+        # Stream the upload to the temp location in fixed-size chunks so
+        # memory use does not grow with the file size
+        async with aiofiles.open(temp_path, "wb") as temp_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await temp_file.write(chunk)
         
-        try:
-            # Write uploaded file to temp location
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.flush()
-            
-            # Ingest the document
-            ingestion_service = DocumentIngestionService()
-            message_ids = await ingestion_service.ingest_document(
-                temp_path, 
-                source_type
-            )
-            
-            return IngestionResponse(
-                success=True,
-                message=f"Successfully ingested {file.filename}",
-                message_ids=message_ids,
-                chunks_created=len(message_ids)
-            )
-            
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to ingest document: {str(e)}"
-            )
-        finally:
-            # Clean up temp file
-            if temp_path.exists():
-                temp_path.unlink()
+        # Queue the document; the job removes the directory when done
+        job = ingestion_jobs.submit(upload_dir, temp_path.name, source_type)
+        
+    except Exception as e:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to queue document: {str(e)}"
+        )
+    
+    return IngestionJobResponse(
+        job_id=job.id,
+        status=job.status,
+        filename=job.filename
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    _: str = Depends(verify_token)
+) -> IngestionJobResponse:
+    """
+    Get the status of a background document ingestion job.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    
+    return IngestionJobResponse(
+        job_id=job.id,
+        status=job.status,
+        filename=job.filename,
+        message_ids=job.message_ids,
+        chunks_created=len(job.message_ids),
+        error=job.error
+    )
 
 
 @router.post("/bulk-guidelines", response_model=IngestionResponse)
 async def ingest_bulk_guidelines(
     request: BulkGuidelinesRequest,
-    _: str = Depends(verify_token)
+    _: str = Depends(verify_token),
+    ingestion_service: DocumentIngestionService = Depends(get_ingestion_service)
 ) -> IngestionResponse:
     """
     Ingest multiple medical guidelines from structured data.
     """
     try:
-        ingestion_service = DocumentIngestionService()
         message_ids = await ingestion_service.ingest_medical_guidelines(
             [guideline.dict() for guideline in request.guidelines]
         )
@@ -122,12 +183,14 @@ async def ingest_bulk_guidelines(
 
 
 @router.get("/status")
-async def get_ingestion_status(_: str = Depends(verify_token)) -> Dict[str, Any]:
+async def get_ingestion_status(
+    _: str = Depends(verify_token),
+    ingestion_service: DocumentIngestionService = Depends(get_ingestion_service)
+) -> Dict[str, Any]:
     """
     Get status of the knowledge base ingestion.
     """
     try:
-        ingestion_service = DocumentIngestionService()
         stats = await ingestion_service.get_knowledge_stats()
         
         return {
@@ -152,43 +215,34 @@ async def clear_knowledge_base(_: str = Depends(verify_token)) -> Dict[str, str]
     Use with caution - this will remove all ingested data.
     """
     try:
-        from app.db.core import AsyncSessionLocal
-        from app.db.models import Message, Embedding, Thread, MessageRole
-        from sqlmodel import select
-        
         async with AsyncSessionLocal() as session:
-            # Delete all system messages (knowledge base)
-            system_messages_result = await session.exec(
-                select(Message).where(Message.role == MessageRole.SYSTEM)
+            # Knowledge base content is stored as system messages
+            system_message_ids = select(Message.id).where(
+                Message.role == MessageRole.SYSTEM
             )
-            system_messages = system_messages_result.all()
             
-            for message in system_messages:
-                await session.delete(message)
-            
-            # Delete orphaned embeddings
-            embeddings_result = await session.exec(select(Embedding))
-            embeddings = embeddings_result.all()
+            # Delete embeddings of the knowledge chunks first (foreign key)
+            embeddings_result = await session.execute(
+                delete(Embedding).where(Embedding.message_id.in_(system_message_ids))
+            )
             
-            for embedding in embeddings:
-                await session.delete(embedding)
+            # Delete all system messages (knowledge base)
+            messages_result = await session.execute(
+                delete(Message).where(Message.role == MessageRole.SYSTEM)
+            )
             
             # Delete knowledge base threads
-            threads_result = await session.exec(
-                select(Thread).where(
+            threads_result = await session.execute(
+                delete(Thread).where(
                     Thread.title.contains("knowledge_base") | 
                     Thread.title.contains("Medical Guidelines")
                 )
             )
-            threads = threads_result.all()
-            
-            for thread in threads:
-                await session.delete(thread)
             
             await session.commit()
             
             return {
-                "message": f"Cleared {len(system_messages)} knowledge chunks, {len(embeddings)} embeddings, and {len(threads)} threads"
+                "message": f"Cleared {messages_result.rowcount} knowledge chunks, {embeddings_result.rowcount} embeddings, and {threads_result.rowcount} threads"
             }
             
     except Exception as e:
@@ -5,21 +5,27 @@ This module provides the sync endpoint that accepts Realm database deltas
 from mobile clients and synchronizes threads, messages, and embeddings.
 """
 
-from typing import Any, Dict, List
-from uuid import UUID
+from typing import Any, List, Set, Tuple
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
+from app.api.auth import BEARER_PREFIX, is_dev_token
 from app.db.core import get_session
-from app.db.models import Embedding, Message, MessageRole, Thread
-from app.db.vector import PGVectorRetriever
+from app.db.models import ROLE_LOOKUP, Embedding, Message, MessageRole, Thread
+from app.services.embeddings import embed_texts
+from app.settings import settings
 
 # Create router for sync endpoints
 router = APIRouter(prefix="/sync", tags=["sync"])
 
+# Maximum number of rows per upsert statement and texts per embeddings call
+SYNC_BATCH_SIZE = 500
+
 
 class ThreadDelta(BaseModel):
     """Delta model for thread synchronization."""
@@ -66,26 +72,42 @@ def verify_auth_token(request: Request) -> bool:
     Raises:
         HTTPException: If authentication fails
     """
-    from app.settings import settings
-    
     auth_header = request.headers.get("Authorization")
     
     if not auth_header:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
     
-    if not auth_header.startswith("Bearer "):
+    if not auth_header.startswith(BEARER_PREFIX):
         raise HTTPException(status_code=401, detail="Invalid Authorization header format")
     
-    token = auth_header.replace("Bearer ", "")
+    # Strip only the leading scheme; the token itself is left untouched
+    token = auth_header[len(BEARER_PREFIX):].strip()
     
     # In debug mode, accept the dev token
-    if settings.debug and token == settings.dev_token:
+    if settings.debug and is_dev_token(token):
         return True
     
     # TODO: Implement proper token validation
     raise HTTPException(status_code=401, detail="Invalid authentication token")
 
 
+def latest_deltas(deltas: List[Any]) -> List[Any]:
+    """
+    Keep only the last delta for each id.
+    
+    Deltas for the same id are applied in order, so only the last one
+    determines the row's final state. Collapsing them also keeps each id
+    to a single row per upsert statement, which Postgres requires.
+    
+    Args:
+        deltas: Thread or message deltas in client order
+        
+    Returns:
+        The last delta for each id
+    """
+    return list({delta.id: delta for delta in deltas}.values())
+
+
 async def sync_threads(
     session: AsyncSession, 
     thread_deltas: List[ThreadDelta]
@@ -93,6 +115,10 @@ async def sync_threads(
     """
     Synchronize thread deltas with the database.
     
+    Inserts and updates are applied as INSERT ... ON CONFLICT DO UPDATE
+    upserts and deletes as a single DELETE, instead of per-row statements.
+    Changes are left uncommitted for the caller.
+    
     Args:
         session: Database session
         thread_deltas: List of thread delta operations
@@ -103,44 +129,65 @@ async def sync_threads(
     synced_count = 0
     errors = []
     
-    for delta in thread_deltas:
-        try:
-            if delta.operation == "insert" or delta.operation == "update":
-                # Check if thread exists
-                query = select(Thread).where(Thread.id == delta.id)
-                result = await session.execute(query)
-                existing_thread = result.scalar_one_or_none()
-                
-                if existing_thread:
-                    # Update existing thread
-                    existing_thread.title = delta.title
-                else:
-                    # Insert new thread
-                    new_thread = Thread(
-                        id=delta.id,
-                        title=delta.title
-                    )
-                    session.add(new_thread)
-                
-                synced_count += 1
-                
-            elif delta.operation == "delete":
-                # Delete thread and related messages
-                query = select(Thread).where(Thread.id == delta.id)
-                result = await session.execute(query)
-                thread_to_delete = result.scalar_one_or_none()
-                
-                if thread_to_delete:
-                    await session.delete(thread_to_delete)
-                    synced_count += 1
-                    
-        except Exception as e:
-            errors.append(f"Thread {delta.id}: {str(e)}")
+    deltas = latest_deltas(thread_deltas)
+    upserts = [delta for delta in deltas if delta.operation in ("insert", "update")]
+    deleted_ids = [delta.id for delta in deltas if delta.operation == "delete"]
+    
+    for start in range(0, len(upserts), SYNC_BATCH_SIZE):
+        batch = upserts[start:start + SYNC_BATCH_SIZE]
+        statement = pg_insert(Thread).values([
+            {"id": delta.id, "title": delta.title}
+            for delta in batch
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Thread.id],
+            set_={"title": statement.excluded.title}
+        )
+        await session.execute(statement)
+        synced_count += len(batch)
+    
+    if deleted_ids:
+        # Delete threads together with their messages and embeddings
+        thread_message_ids = select(Message.id).where(Message.thread_id.in_(deleted_ids))
+        await session.execute(
+            delete(Embedding).where(Embedding.message_id.in_(thread_message_ids))
+        )
+        await session.execute(
+            delete(Message).where(Message.thread_id.in_(deleted_ids))
+        )
+        result = await session.execute(
+            delete(Thread).where(Thread.id.in_(deleted_ids))
+        )
+        synced_count += result.rowcount
     
-    await session.commit()
     return synced_count, errors
 
 
+async def find_existing_thread_ids(
+    session: AsyncSession,
+    thread_ids: Set[UUID]
+) -> Set[UUID]:
+    """
+    Look up which of the given thread ids exist.
+    
+    Runs inside the caller's transaction, so threads upserted or deleted
+    earlier in the same sync request are taken into account.
+    
+    Args:
+        session: Database session
+        thread_ids: Thread ids referenced by message deltas
+        
+    Returns:
+        The subset of thread_ids present in the threads table
+    """
+    if not thread_ids:
+        return set()
+    result = await session.execute(
+        select(Thread.id).where(Thread.id.in_(thread_ids))
+    )
+    return set(result.scalars().all())
+
+
 async def sync_messages(
     session: AsyncSession, 
     message_deltas: List[MessageDelta]
@@ -148,6 +195,13 @@ async def sync_messages(
     """
     Synchronize message deltas with the database and generate embeddings.
     
+    Inserts and updates are applied as INSERT ... ON CONFLICT DO UPDATE
+    upserts for messages and their embeddings, and deletes as a single
+    DELETE per table, instead of per-row statements. Messages that
+    reference a missing thread are reported in errors and skipped, so
+    they do not fail the rest of the sync. Changes are left uncommitted
+    for the caller.
+    
     Args:
         session: Database session
         message_deltas: List of message delta operations
@@ -157,78 +211,84 @@ async def sync_messages(
     """
     synced_count = 0
     errors = []
-    vector_retriever = PGVectorRetriever(session)
     
-    for delta in message_deltas:
+    deltas = latest_deltas(message_deltas)
+    deleted_ids = [delta.id for delta in deltas if delta.operation == "delete"]
+    
+    # Validate roles up front so only valid upserts are embedded
+    upserts: List[Tuple[MessageDelta, MessageRole]] = []
+    for delta in deltas:
+        if delta.operation == "insert" or delta.operation == "update":
+            role = ROLE_LOOKUP.get(delta.role)
+            if role is None:
+                errors.append(f"Message {delta.id}: Invalid role '{delta.role}'")
+                continue
+            upserts.append((delta, role))
+    
+    for start in range(0, len(upserts), SYNC_BATCH_SIZE):
+        batch = upserts[start:start + SYNC_BATCH_SIZE]
+        
+        # Report messages for unknown threads instead of letting their
+        # foreign key violation abort the whole transaction
+        existing_thread_ids = await find_existing_thread_ids(
+            session, {delta.thread_id for delta, _ in batch}
+        )
+        orphans = [delta for delta, _ in batch if delta.thread_id not in existing_thread_ids]
+        errors.extend(
+            f"Message {delta.id}: Thread {delta.thread_id} does not exist"
+            for delta in orphans
+        )
+        batch = [(delta, role) for delta, role in batch if delta.thread_id in existing_thread_ids]
+        if not batch:
+            continue
+        
+        # Generate embeddings in one call rather than one per message
         try:
-            if delta.operation == "insert" or delta.operation == "update":
-                # Validate role
-                try:
-                    role = MessageRole(delta.role)
-                except ValueError:
-                    errors.append(f"Message {delta.id}: Invalid role '{delta.role}'")
-                    continue
-                
-                # Check if message exists
-                query = select(Message).where(Message.id == delta.id)
-                result = await session.execute(query)
-                existing_message = result.scalar_one_or_none()
-                
-                if existing_message:
-                    # Update existing message
-                    existing_message.role = role
-                    existing_message.content = delta.content
-                    message = existing_message
-                else:
-                    # Insert new message
-                    message = Message(
-                        id=delta.id,
-                        thread_id=delta.thread_id,
-                        role=role,
-                        content=delta.content
-                    )
-                    session.add(message)
-                
-                await session.commit()
-                await session.refresh(message)
-                
-                # Generate and store embedding
-                embedding_vector = await vector_retriever.embeddings.aembed_query(
-                    delta.content
-                )
-                
-                # Check if embedding exists
-                embedding_query = select(Embedding).where(
-                    Embedding.message_id == message.id
-                )
-                embedding_result = await session.execute(embedding_query)
-                existing_embedding = embedding_result.scalar_one_or_none()
-                
-                if existing_embedding:
-                    existing_embedding.vector = embedding_vector
-                else:
-                    embedding = Embedding(
-                        message_id=message.id,
-                        vector=embedding_vector
-                    )
-                    session.add(embedding)
-                
-                synced_count += 1
-                
-            elif delta.operation == "delete":
-                # Delete message and its embedding
-                query = select(Message).where(Message.id == delta.id)
-                result = await session.execute(query)
-                message_to_delete = result.scalar_one_or_none()
-                
-                if message_to_delete:
-                    await session.delete(message_to_delete)
-                    synced_count += 1
-                    
+            vectors = await embed_texts([delta.content for delta, _ in batch])
         except Exception as e:
-            errors.append(f"Message {delta.id}: {str(e)}")
+            errors.extend(f"Message {delta.id}: {str(e)}" for delta, _ in batch)
+            continue
+        
+        message_statement = pg_insert(Message).values([
+            {
+                "id": delta.id,
+                "thread_id": delta.thread_id,
+                "role": role,
+                "content": delta.content
+            }
+            for delta, role in batch
+        ])
+        message_statement = message_statement.on_conflict_do_update(
+            index_elements=[Message.id],
+            set_={
+                "role": message_statement.excluded.role,
+                "content": message_statement.excluded.content
+            }
+        )
+        await session.execute(message_statement)
+        
+        embedding_statement = pg_insert(Embedding).values([
+            {"id": uuid4(), "message_id": delta.id, "vector": vector}
+            for (delta, _), vector in zip(batch, vectors)
+        ])
+        embedding_statement = embedding_statement.on_conflict_do_update(
+            index_elements=[Embedding.message_id],
+            set_={"vector": embedding_statement.excluded.vector}
+        )
+        await session.execute(embedding_statement)
+        
+        synced_count += len(batch)
+    
+    if deleted_ids:
+        # Delete messages and their embeddings
+        await session.execute(
+            delete(Embedding).where(Embedding.message_id.in_(deleted_ids))
+        )
+        result = await session.execute(
+            delete(Message).where(Message.id.in_(deleted_ids))
+        )
+        synced_count += result.rowcount
     
-    await session.commit()
     return synced_count, errors
 
 
@@ -270,6 +330,9 @@ async def sync_endpoint(
         )
         all_errors.extend(message_errors)
         
+        # Commit threads and messages together in a single transaction
+        await session.commit()
+        
         success = len(all_errors) == 0
         
         return SyncResponse(
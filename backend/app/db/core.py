@@ -6,22 +6,97 @@ for connecting to PostgreSQL with pgvector extension support.
 """
 
 import asyncio
-from typing import AsyncGenerator
+import re
+import socket
+from typing import Any, AsyncGenerator, Optional
 
 import asyncpg
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel
 
 from app.settings import settings
 
-# Create async engine for SQLModel/SQLAlchemy operations
+# Plain postgresql:// DSN for raw asyncpg connections, whatever driver
+# the configured URL names
+ASYNCPG_DSN = re.sub(r"^postgresql(\+\w+)?://", "postgresql://", settings.database_url)
+
+
+# Seconds between unanswered keepalive probes, and probes before the
+# connection is considered dead
+DB_TCP_KEEPALIVE_INTERVAL_SECONDS = 10
+DB_TCP_KEEPALIVE_COUNT = 3
+
+# Server-side keepalive for every connection, set through standard
+# PostgreSQL parameters. Idle connections are probed from the server end,
+# so NAT and firewall idle timeouts do not silently drop them.
+KEEPALIVE_SERVER_SETTINGS = {
+    "tcp_keepalives_idle": str(settings.db_tcp_keepalive_idle_seconds),
+    "tcp_keepalives_interval": str(DB_TCP_KEEPALIVE_INTERVAL_SECONDS),
+    "tcp_keepalives_count": str(DB_TCP_KEEPALIVE_COUNT),
+}
+
+
+def enable_tcp_keepalive(connection: asyncpg.Connection) -> None:
+    """
+    Turn on TCP keepalive probes for an asyncpg connection's socket.
+    
+    Dead connections are then detected by the kernel while idle instead
+    of by a ping before every checkout. asyncpg does not expose its socket
+    publicly, so this is best effort on top of KEEPALIVE_SERVER_SETTINGS:
+    it is skipped if the driver's transport is not available. Unix socket
+    connections are left untouched.
+    
+    Args:
+        connection: Raw asyncpg connection
+    """
+    transport = getattr(connection, "_transport", None)
+    if transport is None:
+        return
+    
+    sock = transport.get_extra_info("socket")
+    if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, settings.db_tcp_keepalive_idle_seconds
+        )
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, DB_TCP_KEEPALIVE_INTERVAL_SECONDS)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, DB_TCP_KEEPALIVE_COUNT)
+
+
+# Create async engine for SQLModel/SQLAlchemy operations, always on asyncpg
 engine = create_async_engine(
-    settings.database_url,
+    ASYNCPG_DSN.replace("postgresql://", "postgresql+asyncpg://", 1),
     echo=settings.debug,
     future=True,
-    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_pre_ping=False,
+    connect_args={
+        # Short OLTP queries never benefit from JIT compilation
+        "server_settings": {"jit": "off", **KEEPALIVE_SERVER_SETTINGS},
+        "timeout": settings.db_connect_timeout_seconds,
+        "statement_cache_size": 1024,
+        "prepared_statement_cache_size": 256,
+    },
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def on_engine_connect(dbapi_connection: Any, connection_record: Any) -> None:
+    """Enable TCP keepalive on each new engine connection."""
+    enable_tcp_keepalive(dbapi_connection.driver_connection)
+
+
+# Raw asyncpg pool, created on first use by get_asyncpg_connection
+asyncpg_pool: Optional[asyncpg.Pool] = None
+asyncpg_pool_lock = asyncio.Lock()
+
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -47,21 +122,37 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def warm_connection_pool() -> None:
+    """
+    Open the pool's base connections ahead of the first request.
+    
+    Each connection is checked out concurrently and returned to the pool,
+    so the first requests after startup do not pay the connection and
+    authentication handshake.
+    """
+    async def open_connection() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    
+    await asyncio.gather(*(open_connection() for _ in range(settings.db_pool_size)))
+
+
 async def create_extension() -> None:
     """
-    Create the pgvector extension in the database.
+    Create the pgvector and pg_trgm extensions in the database.
     
     This function connects directly to PostgreSQL using asyncpg
     to enable the pgvector extension which is required for vector operations.
+    pg_trgm, used to index thread title searches, is optional.
     """
-    # Extract connection parameters from SQLAlchemy URL
-    url_parts = settings.database_url.replace("postgresql+psycopg://", "postgresql://")
-    url_parts = url_parts.replace("postgresql+asyncpg://", "postgresql://")
-    
     try:
-        connection = await asyncpg.connect(url_parts)
-        await connection.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-        await connection.close()
+        async for connection in get_asyncpg_connection():
+            try:
+                await connection.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            except Exception as e:
+                print(f"⚠️ pg_trgm extension unavailable - thread title searches won't be indexed: {e}")
+            
+            await connection.execute("CREATE EXTENSION IF NOT EXISTS vector;")
         print("Successfully created pgvector extension")
     except Exception as e:
         if "extension \"vector\" is not available" in str(e):
@@ -87,10 +178,49 @@ async def create_tables() -> None:
     Create all database tables defined in SQLModel models.
     
     This function should be called during application startup
-    to ensure all tables exist in the database.
+    to ensure all tables exist in the database. It also applies the
+    storage tuning that create_all cannot express.
     """
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        
+        # Float vectors don't compress, so skip TOAST compression and keep
+        # only out-of-line storage (checked first to avoid a table lock)
+        vector_storage = await conn.scalar(text("""
+            SELECT attstorage FROM pg_attribute
+            WHERE attrelid = 'embeddings'::regclass AND attname = 'vector'
+        """))
+        if vector_storage != "e":
+            await conn.execute(text(
+                "ALTER TABLE embeddings ALTER COLUMN vector SET STORAGE EXTERNAL"
+            ))
+        
+        # created_at follows insertion order, so tiny BRIN indexes cover
+        # time-range scans
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS messages_created_at_brin "
+            "ON messages USING brin (created_at)"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS threads_created_at_brin "
+            "ON threads USING brin (created_at)"
+        ))
+        
+        # Knowledge base threads are found by substring matches on the
+        # title, which a trigram index serves without a sequential scan
+        has_trigram = await conn.scalar(text(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        ))
+        if has_trigram:
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS threads_title_trgm_idx "
+                "ON threads USING gin (title gin_trgm_ops)"
+            ))
+
+
+async def init_asyncpg_connection(connection: asyncpg.Connection) -> None:
+    """Enable TCP keepalive on each new raw pool connection."""
+    enable_tcp_keepalive(connection)
 
 
 async def get_asyncpg_connection() -> AsyncGenerator[asyncpg.Connection, None]:
@@ -98,18 +228,37 @@ async def get_asyncpg_connection() -> AsyncGenerator[asyncpg.Connection, None]:
     Get a raw asyncpg connection for operations that require it.
     
     This is useful for operations like vector similarity search
-    that may need raw SQL execution capabilities.
+    that may need raw SQL execution capabilities. Connections come from
+    a shared pool so callers don't pay a new connection handshake.
     
     Yields:
         asyncpg.Connection: Raw database connection
     """
-    url_parts = settings.database_url.replace("postgresql+psycopg://", "postgresql://")
-    url_parts = url_parts.replace("postgresql+asyncpg://", "postgresql://")
-    connection = await asyncpg.connect(url_parts)
-    try:
+    global asyncpg_pool
+    
+    if asyncpg_pool is None:
+        async with asyncpg_pool_lock:
+            if asyncpg_pool is None:
+                asyncpg_pool = await asyncpg.create_pool(
+                    ASYNCPG_DSN,
+                    min_size=settings.asyncpg_pool_min_size,
+                    max_size=settings.asyncpg_pool_max_size,
+                    timeout=settings.db_connect_timeout_seconds,
+                    server_settings=KEEPALIVE_SERVER_SETTINGS,
+                    init=init_asyncpg_connection
+                )
+    
+    async with asyncpg_pool.acquire() as connection:
         yield connection
-    finally:
-        await connection.close()
+
+
+async def close_asyncpg_pool() -> None:
+    """Close the raw asyncpg pool, e.g. on shutdown."""
+    global asyncpg_pool
+    
+    if asyncpg_pool is not None:
+        await asyncpg_pool.close()
+        asyncpg_pool = None
 
 
 if __name__ == "__main__":
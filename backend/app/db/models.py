@@ -7,13 +7,15 @@ Includes Thread, Message, and Embedding models with proper relationships.
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID, uuid4
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column, DateTime, ForeignKey, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, LargeBinary, Text, func
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.settings import settings
+
 
 class MessageRole(str, Enum):
     """Enumeration for message roles in conversations."""
@@ -22,6 +24,10 @@ class MessageRole(str, Enum):
     ASSISTANT = "ASSISTANT"
 
 
+# Roles by value, for validating client-supplied roles without exceptions
+ROLE_LOOKUP: Dict[str, MessageRole] = {role.value: role for role in MessageRole}
+
+
 class Thread(SQLModel, table=True):
     """
     Thread model representing a conversation thread.
@@ -55,6 +61,12 @@ class Message(SQLModel, table=True):
     Messages can be from system, user, or assistant and contain the conversation content.
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Thread-scoped retrieval in chronological order
+        Index("ix_messages_thread_created", "thread_id", "created_at"),
+        # Embedding reuse for repeated knowledge base chunks
+        Index("ix_messages_content_hash", "content_hash"),
+    )
     
     id: UUID = Field(
         default_factory=uuid4,
@@ -72,6 +84,11 @@ class Message(SQLModel, table=True):
         sa_column=Column(Text),
         description="The actual message content"
     )
+    content_hash: Optional[bytes] = Field(
+        default=None,
+        sa_column=Column(LargeBinary, nullable=True),
+        description="SHA-256 digest of the content, set for knowledge base chunks"
+    )
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
         description="Timestamp when the message was created"
@@ -86,8 +103,9 @@ class Embedding(SQLModel, table=True):
     """
     Embedding model for storing vector representations of messages.
     
-    Uses pgvector to store one thousand five hundred thirty six dimensional vectors
-    for semantic similarity search and retrieval augmented generation.
+    Uses pgvector to store vectors of the configured dimension (one thousand five
+    hundred thirty six for OpenAI embeddings) for semantic similarity search and
+    retrieval augmented generation.
     """
     __tablename__ = "embeddings"
     
@@ -102,8 +120,8 @@ class Embedding(SQLModel, table=True):
         description="Foreign key reference to the associated message"
     )
     vector: List[float] = Field(
-        sa_column=Column(Vector(1536)),
-        description="One thousand five hundred thirty six dimensional embedding vector"
+        sa_column=Column(Vector(settings.vector_dim)),
+        description="Embedding vector with the configured number of dimensions"
     )
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
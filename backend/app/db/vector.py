@@ -5,14 +5,17 @@ This module provides LangChain integration with PGVector for semantic search
 and retrieval operations using PostgreSQL with pgvector extension.
 """
 
-from typing import Any, Dict, List
-from uuid import UUID
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
+from langchain_core.embeddings import Embeddings
 from langchain_postgres import PGVector
-from langchain_openai import OpenAIEmbeddings
+from pgvector.asyncpg import register_vector
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.core import engine
+from app.db.core import engine, get_asyncpg_connection
+from app.db.models import MessageRole
+from app.services import embeddings as embedding_service
 from app.settings import settings
 
 
@@ -24,18 +27,23 @@ class PGVectorRetriever:
     using cosine similarity and hierarchical navigable small world indexing.
     """
     
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: Optional[AsyncSession] = None,
+        embeddings: Optional[Embeddings] = None
+    ) -> None:
         """
         Initialize the PGVector retriever.
         
+        The vector store talks to the database through the shared engine, so
+        a single instance can safely be reused across requests.
+        
         Args:
-            session: Database session for vector operations
+            session: Optional database session for vector operations
+            embeddings: Embeddings client to use (defaults to the shared client)
         """
         self.session = session
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=settings.openai_api_key
-        )
+        self.embeddings = embeddings or embedding_service.embeddings
         
         # Configure PGVector with cosine distance
         self.vector_store = PGVector(
@@ -124,21 +132,125 @@ class PGVectorRetriever:
         )
 
 
+# Lazily constructed shared retriever
+_vector_retriever: Optional[PGVectorRetriever] = None
+
+
+def get_vector_retriever() -> PGVectorRetriever:
+    """
+    Get the shared PGVector retriever, creating it on first use.
+    
+    Returns:
+        Process-wide PGVectorRetriever instance
+    """
+    global _vector_retriever
+    
+    if _vector_retriever is None:
+        _vector_retriever = PGVectorRetriever()
+    
+    return _vector_retriever
+
+
+async def copy_knowledge_chunks(
+    thread_id: UUID,
+    thread_title: str,
+    chunks: List[Tuple[UUID, str, bytes, List[float]]]
+) -> None:
+    """
+    Bulk load knowledge base chunks using COPY instead of per-row INSERTs.
+    
+    The thread, one system message per chunk and the chunk embeddings are
+    written in a single transaction, streaming the messages and embeddings
+    through binary COPY.
+    
+    Args:
+        thread_id: Identifier of the knowledge base thread to create
+        thread_title: Title of the knowledge base thread
+        chunks: Tuples of (message_id, content, content_hash, embedding_vector)
+    """
+    async for connection in get_asyncpg_connection():
+        await register_vector(connection)
+        
+        async with connection.transaction():
+            await connection.execute(
+                "INSERT INTO threads (id, title) VALUES ($1, $2)",
+                thread_id,
+                thread_title
+            )
+            await connection.copy_records_to_table(
+                "messages",
+                records=[
+                    (message_id, thread_id, MessageRole.SYSTEM.name, content, content_hash)
+                    for message_id, content, content_hash, _ in chunks
+                ],
+                columns=["id", "thread_id", "role", "content", "content_hash"]
+            )
+            await connection.copy_records_to_table(
+                "embeddings",
+                records=[
+                    (uuid4(), message_id, vector)
+                    for message_id, _, _, vector in chunks
+                ],
+                columns=["id", "message_id", "vector"]
+            )
+
+
+# Session advisory lock taken while the vector index is maintained, so only
+# one process (e.g. one of several server workers) builds it at a time
+VECTOR_INDEX_LOCK_KEY = 7_316_402_118
+
+
 async def create_vector_index() -> None:
     """
     Create the hierarchical navigable small world index on the vector column.
     
     This function creates an HNSW index optimized for cosine similarity search
     on the embeddings table vector column for improved query performance.
-    """
-    from app.db.core import get_asyncpg_connection
+    The index is built CONCURRENTLY so writes to embeddings are not blocked,
+    with enough maintenance memory for the graph to be built in RAM.
     
+    Every server process calls this at startup. The first one takes an
+    advisory lock for the whole drop/create sequence; the others skip the
+    build instead of dropping the in-progress (not yet valid) index or
+    claiming the maintenance memory a second time.
+    """
     try:
         async for connection in get_asyncpg_connection():
+            locked = await connection.fetchval(
+                "SELECT pg_try_advisory_lock($1)", VECTOR_INDEX_LOCK_KEY
+            )
+            if not locked:
+                print("Vector index is being built by another process - skipping")
+                return
+            
             try:
+                # Session-level settings: CREATE INDEX CONCURRENTLY cannot
+                # run inside a transaction, so SET LOCAL would have no effect
+                await connection.execute(
+                    "SELECT set_config('maintenance_work_mem', $1, false)",
+                    settings.vector_index_maintenance_work_mem
+                )
+                await connection.execute(
+                    "SELECT set_config('max_parallel_maintenance_workers', $1, false)",
+                    str(settings.vector_index_parallel_workers)
+                )
+                
+                # An interrupted concurrent build leaves an invalid index
+                # behind, which IF NOT EXISTS would otherwise keep forever.
+                # Holding the lock means no other build is still running.
+                invalid = await connection.fetchval("""
+                    SELECT 1 FROM pg_index
+                    WHERE indexrelid = to_regclass('embeddings_vector_cosine_idx')
+                    AND NOT indisvalid
+                """)
+                if invalid:
+                    await connection.execute(
+                        "DROP INDEX CONCURRENTLY IF EXISTS embeddings_vector_cosine_idx"
+                    )
+                
                 # Create HNSW index for cosine similarity on embeddings vector column
                 await connection.execute("""
-                    CREATE INDEX IF NOT EXISTS embeddings_vector_cosine_idx 
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS embeddings_vector_cosine_idx 
                     ON embeddings 
                     USING hnsw (vector vector_cosine_ops)
                     WITH (m = 16, ef_construction = 64);
@@ -150,6 +262,10 @@ async def create_vector_index() -> None:
                     return
                 else:
                     raise
+            finally:
+                await connection.execute(
+                    "SELECT pg_advisory_unlock($1)", VECTOR_INDEX_LOCK_KEY
+                )
     except Exception as e:
         print(f"⚠️ Vector index creation skipped: {e}")
         # Don't fail startup if vector index can't be created
@@ -6,19 +6,35 @@ the PainAR augmented reality healthcare backend with all endpoints,
 middleware, and observability features.
 """
 
+import asyncio
 import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, Tuple
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_client import Counter, Histogram, generate_latest
 from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.api import chat, health, sync
 from app.api import ingestion
-from app.db.core import create_extension, create_tables
+from app.db.core import (
+    close_asyncpg_pool,
+    create_extension,
+    create_tables,
+    warm_connection_pool,
+)
 from app.db.vector import create_vector_index
+from app.services.assessment_store import assessment_store
+from app.services.http_client import close_http_client
+from app.services.ingestion_jobs import ingestion_jobs
 from app.settings import settings
 
 # Configure logging
@@ -37,6 +53,21 @@ REQUEST_DURATION = Histogram(
     ["method", "endpoint"]
 )
 
+# Endpoint label for requests that matched no route
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+# Labelled metric children, cached by label values so that each request
+# skips the registry's labels() lookup
+request_count_children: Dict[Tuple[str, str, int], Any] = {}
+request_duration_children: Dict[Tuple[str, str], Any] = {}
+
+# Seconds a serialized metrics scrape is reused for
+METRICS_CACHE_TTL_SECONDS = 1.0
+
+# Last serialized scrape as (monotonic time, payload)
+metrics_cache: Tuple[float, bytes] = (0.0, b"")
+metrics_lock = asyncio.Lock()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
@@ -55,11 +86,26 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Initialize database extensions and tables
         await create_extension()
         await create_tables()
-        await create_vector_index()
+        await warm_connection_pool()
+        
+        # Build the vector index in the background so startup isn't held up
+        vector_index_task = asyncio.create_task(create_vector_index())
         logger.info("Database initialization completed")
         
+        # Worker processes for CPU-bound document parsing. Spawned rather
+        # than forked so workers don't inherit the event loop's threads.
+        app.state.ingestion_pool = ProcessPoolExecutor(
+            max_workers=settings.ingestion_workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        ingestion_jobs.start(
+            ingestion.get_ingestion_service,
+            app.state.ingestion_pool,
+            workers=settings.ingestion_job_workers
+        )
+        
         # Initialize observability
-        await initialize_observability()
+        await initialize_observability(app)
         logger.info("Observability initialization completed")
         
     except Exception as e:
@@ -72,18 +118,40 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Shutdown tasks
     logger.info("Shutting down PainAR backend...")
+    
+    # Stop an unfinished index build; it is retried on the next startup
+    vector_index_task.cancel()
+    await ingestion_jobs.stop()
+    app.state.ingestion_pool.shutdown(wait=False, cancel_futures=True)
+    
+    # Let pending chat persistence finish before the event loop stops
+    await chat.drain_background_tasks()
+    await close_http_client()
+    await assessment_store.close()
+    await close_asyncpg_pool()
 
 
-async def initialize_observability() -> None:
-    """Initialize observability tools including LangSmith and Sentry."""
+async def initialize_observability(app: FastAPI) -> None:
+    """
+    Initialize observability tools including LangSmith and Sentry.
+    
+    The integrations are only imported when configured. The LangSmith
+    client is kept on app.state so it is created once per process.
+    
+    Args:
+        app: FastAPI application instance
+    """
+    app.state.langsmith_client = None
+    
+    if not settings.langsmith_api_key and not settings.sentry_dsn:
+        return
     
     # Initialize LangSmith tracing if API key is provided
     if settings.langsmith_api_key:
         try:
-            import langsmith
             from langsmith import Client
             
-            client = Client(
+            app.state.langsmith_client = Client(
                 api_key=settings.langsmith_api_key,
                 # Additional LangSmith configuration
             )
@@ -116,32 +184,67 @@ async def initialize_observability() -> None:
             logger.warning(f"Sentry initialization failed: {e}")
 
 
-async def prometheus_middleware(request: Request, call_next) -> Response:
+class PrometheusASGIMiddleware:
     """
-    Middleware to collect Prometheus metrics for HTTP requests.
+    Pure ASGI middleware collecting Prometheus metrics for HTTP requests.
     
-    Args:
-        request: FastAPI request object
-        call_next: Next middleware/endpoint in the chain
-        
-    Returns:
-        Response object with metrics recorded
+    Unlike a BaseHTTPMiddleware, it does not wrap requests and responses
+    in intermediate objects or extra tasks; it only observes the response
+    status as it is sent and times the request. Requests are labelled by
+    route template (e.g. /chat/assessment/{session_id}) rather
+    than raw path, which keeps label cardinality bounded.
     """
-    method = request.method
-    endpoint = request.url.path
     
-    # Start timing the request
-    with REQUEST_DURATION.labels(method=method, endpoint=endpoint).time():
-        response = await call_next(request)
-    
-    # Record request count with status
-    REQUEST_COUNT.labels(
-        method=method,
-        endpoint=endpoint,
-        status=response.status_code
-    ).inc()
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: Next ASGI application in the chain
+        """
+        self.app = app
     
-    return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            endpoint = route.path if route is not None else UNMATCHED_ENDPOINT
+            
+            duration_key = (method, endpoint)
+            duration_child = request_duration_children.get(duration_key)
+            if duration_child is None:
+                duration_child = request_duration_children.setdefault(
+                    duration_key,
+                    REQUEST_DURATION.labels(method=method, endpoint=endpoint)
+                )
+            duration_child.observe(duration)
+            
+            count_key = (method, endpoint, status_code)
+            count_child = request_count_children.get(count_key)
+            if count_child is None:
+                count_child = request_count_children.setdefault(
+                    count_key,
+                    REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code)
+                )
+            count_child.inc()
 
 
 def create_app() -> FastAPI:
@@ -160,6 +263,7 @@ def create_app() -> FastAPI:
         description="Augmented Reality Healthcare Backend with RAG Chat",
         version="1.0.0",
         debug=settings.debug,
+        default_response_class=ORJSONResponse,
         lifespan=lifespan,
     )
     
@@ -169,11 +273,12 @@ def create_app() -> FastAPI:
         allow_origins=settings.allowed_hosts_list,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE"],
-        allow_headers=["*"],
+        allow_headers=["Authorization", "Content-Type", "X-Requested-With", "X-Session-Id"],
+        max_age=86400,
     )
     
     # Add Prometheus metrics middleware
-    app.middleware("http")(prometheus_middleware)
+    app.add_middleware(PrometheusASGIMiddleware)
     
     # Include API routers
     app.include_router(health.router)
@@ -187,10 +292,22 @@ def create_app() -> FastAPI:
         """
         Prometheus metrics endpoint for monitoring and observability.
         
+        Concurrent or back-to-back scrapes within METRICS_CACHE_TTL_SECONDS
+        share one serialization of the registry.
+        
         Returns:
             Prometheus metrics in OpenMetrics format
         """
-        metrics_data = generate_latest()
+        global metrics_cache
+        
+        generated_at, metrics_data = metrics_cache
+        if time.monotonic() - generated_at >= METRICS_CACHE_TTL_SECONDS:
+            async with metrics_lock:
+                generated_at, metrics_data = metrics_cache
+                if time.monotonic() - generated_at >= METRICS_CACHE_TTL_SECONDS:
+                    metrics_data = generate_latest()
+                    metrics_cache = (time.monotonic(), metrics_data)
+        
         return Response(
             content=metrics_data,
             media_type=CONTENT_TYPE_LATEST
@@ -221,10 +338,15 @@ app = create_app()
 if __name__ == "__main__":
     import uvicorn
     
+    # uvloop and httptools come with uvicorn[standard]; uvloop has no Windows build.
+    # Reloading only works with a single worker, so debug mode ignores SERVER_WORKERS.
     uvicorn.run(
         "app.main:create_app",
         host="0.0.0.0",
         port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=1 if settings.debug else settings.server_workers,
         reload=settings.debug,
         factory=True
     )
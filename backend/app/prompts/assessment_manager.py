@@ -4,13 +4,76 @@ Manages the flow of injury assessment conversations and data collection.
 """
 
 from typing import Dict, List, Optional, Any
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
+import re
+import time
 from enum import Enum
 
+import orjson
+
+from app.settings import settings
+
 from .injury_assessment import injury_assessment, AssessmentPhase, AssessmentQuestion
 
+
+def _keyword_pattern(keywords: tuple, flags: int = 0) -> re.Pattern:
+    """Compile a pattern matching any of the keywords anywhere in a text."""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords), flags)
+
+
+# Keywords extracted from responses, in the order they are reported
+BODY_REGIONS = (
+    "head", "neck", "shoulder", "arm", "elbow", "wrist", "hand",
+    "chest", "back", "abdomen", "hip", "thigh", "knee", "shin",
+    "ankle", "foot", "spine", "lower back", "upper back"
+)
+PAIN_DESCRIPTORS = (
+    "sharp", "dull", "burning", "aching", "throbbing", "stabbing",
+    "cramping", "shooting", "tingling", "numbness", "stiffness"
+)
+INJURY_MECHANISMS = (
+    "fall", "twist", "lift", "bend", "slip", "trip", "crash",
+    "sports", "accident", "sudden", "gradual", "repetitive"
+)
+
+# Substring patterns for urgency and red flag indicators
+NUMBER_PATTERN = re.compile(r'\b(\d+)\b')
+HIGH_PRIORITY_PATTERN = _keyword_pattern((
+    "10", "severe", "unbearable", "worst", "emergency",
+    "numbness", "weakness", "can't move", "tingling",
+    "fever", "nausea", "dizzy", "confused"
+))
+MEDIUM_PRIORITY_PATTERN = _keyword_pattern((
+    "8", "9", "very painful", "difficult", "hard to",
+    "swelling", "bruising", "stiff", "limited"
+))
+RECENT_ONSET_PATTERN = _keyword_pattern((
+    "today", "yesterday", "sudden", "suddenly", "just started"
+))
+RED_FLAG_PATTERN = _keyword_pattern((
+    "numbness", "weakness", "can't move", "paralysis",
+    "severe headache", "fever", "nausea", "vomiting",
+    "loss of consciousness", "confusion", "chest pain"
+), re.IGNORECASE)
+
+# Matches once a response has at least three whitespace-separated words
+THREE_WORDS_PATTERN = re.compile(r'\S+\s+\S+\s+\S')
+
+# Assessment phases in order, and the phase that follows each one
+PHASE_ORDER = (
+    AssessmentPhase.INITIAL_SCREENING,
+    AssessmentPhase.PAIN_CHARACTERISTICS,
+    AssessmentPhase.FUNCTIONAL_IMPACT,
+    AssessmentPhase.MEDICAL_HISTORY,
+    AssessmentPhase.LIFESTYLE_FACTORS,
+    AssessmentPhase.FOLLOW_UP
+)
+NEXT_PHASE = dict(zip(PHASE_ORDER, PHASE_ORDER[1:]))
+
+
 @dataclass
 class UserResponse:
     question_id: str
@@ -31,26 +94,13 @@ class AssessmentData:
     priority_score: int  # Based on red flags and severity indicators
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for storage/transmission."""
-        return {
-            "user_id": self.user_id,
-            "session_id": self.session_id,
-            "start_time": self.start_time.isoformat(),
-            "current_phase": self.current_phase.value,
-            "responses": [
-                {
-                    "question_id": r.question_id,
-                    "response": r.response,
-                    "timestamp": r.timestamp.isoformat(),
-                    "follow_up_asked": r.follow_up_asked,
-                    "follow_up_response": r.follow_up_response
-                }
-                for r in self.responses
-            ],
-            "extracted_data": self.extracted_data,
-            "completion_percentage": self.completion_percentage,
-            "priority_score": self.priority_score
-        }
+        """
+        Convert to dictionary for storage/transmission.
+        
+        Round-trips through to_json() so the nested responses are built by
+        orjson in C rather than field by field in Python.
+        """
+        return orjson.loads(self.to_json())
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'AssessmentData':
@@ -74,6 +124,69 @@ class AssessmentData:
             completion_percentage=data["completion_percentage"],
             priority_score=data["priority_score"]
         )
+    
+    def to_json(self) -> bytes:
+        """
+        Serialize to JSON, with the phase as its value and timestamps in
+        ISO 8601 format.
+        
+        orjson encodes the dataclasses, phase enum and timestamps natively
+        in C, without building the intermediate dictionaries.
+        """
+        return orjson.dumps(self)
+    
+    @classmethod
+    def from_json(cls, payload: bytes) -> 'AssessmentData':
+        """Create from JSON produced by to_json()."""
+        return cls.from_dict(orjson.loads(payload))
+
+class AssessmentCache(OrderedDict):
+    """
+    Session-keyed assessment mapping bounded to the most recently used entries.
+    Reads through get() and assignments mark a session as recently used; the
+    least recently used session is dropped once maxsize is exceeded, and
+    sessions unused for ttl_seconds expire.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = 3600):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._last_used: Dict[str, float] = {}
+    
+    def __setitem__(self, session_id: str, assessment: 'AssessmentData') -> None:
+        super().__setitem__(session_id, assessment)
+        self._touch(session_id)
+        self._evict()
+    
+    def __contains__(self, session_id: object) -> bool:
+        self._evict()
+        return super().__contains__(session_id)
+    
+    def pop(self, session_id: str, default: Optional['AssessmentData'] = None) -> Optional['AssessmentData']:
+        self._last_used.pop(session_id, None)
+        return super().pop(session_id, default)
+    
+    def get(self, session_id: str, default: Optional['AssessmentData'] = None) -> Optional['AssessmentData']:
+        self._evict()
+        if not super().__contains__(session_id):
+            return default
+        self._touch(session_id)
+        return self[session_id]
+    
+    def _touch(self, session_id: str) -> None:
+        self.move_to_end(session_id)
+        self._last_used[session_id] = time.monotonic()
+    
+    def _evict(self) -> None:
+        # Entries are ordered by last use, so expired ones are at the front
+        expire_before = time.monotonic() - self.ttl_seconds
+        while self:
+            session_id = next(iter(self))
+            if len(self) <= self.maxsize and self._last_used[session_id] > expire_before:
+                break
+            self.popitem(last=False)
+            del self._last_used[session_id]
 
 class AssessmentManager:
     """
@@ -81,9 +194,20 @@ class AssessmentManager:
     Tracks progress, determines next questions, and extracts key data points.
     """
     
-    def __init__(self):
-        self.active_assessments: Dict[str, AssessmentData] = {}
+    def __init__(self, max_active_assessments: int = 10000, assessment_ttl_seconds: float = 3600):
+        self.active_assessments = AssessmentCache(
+            maxsize=max_active_assessments,
+            ttl_seconds=assessment_ttl_seconds
+        )
         self.prompts = injury_assessment
+        
+        # The question catalogue is static, so count it once and order each
+        # phase's questions by priority (lower number = higher priority)
+        self._total_questions = sum(len(questions) for questions in self.prompts.questions.values())
+        self._sorted_phase_questions: Dict[AssessmentPhase, List[AssessmentQuestion]] = {
+            phase: sorted(self.prompts.get_phase_questions(phase), key=lambda q: q.priority)
+            for phase in AssessmentPhase
+        }
     
     def start_assessment(self, user_id: str, session_id: str, initial_complaint: str = None) -> AssessmentData:
         """Start a new injury assessment session."""
@@ -111,26 +235,20 @@ class AssessmentManager:
         if not assessment:
             return None
         
-        # Get questions for current phase
-        phase_questions = self.prompts.get_phase_questions(assessment.current_phase)
-        
-        # Find questions not yet asked
         asked_question_ids = {r.question_id for r in assessment.responses}
-        unanswered_questions = [q for q in phase_questions if q.id not in asked_question_ids]
         
-        if unanswered_questions:
-            # Prioritize by priority score (lower number = higher priority)
-            next_question = min(unanswered_questions, key=lambda q: q.priority)
-            return self._format_question(next_question)
-        
-        # Move to next phase if current phase is complete
-        next_phase = self._get_next_phase(assessment.current_phase)
-        if next_phase:
+        while True:
+            # Ask the highest priority question of the current phase not yet asked
+            for question in self._sorted_phase_questions[assessment.current_phase]:
+                if question.id not in asked_question_ids:
+                    return self._format_question(question)
+            
+            # Move to next phase if current phase is complete
+            next_phase = self._get_next_phase(assessment.current_phase)
+            if next_phase is None:
+                # Assessment complete
+                return None
             assessment.current_phase = next_phase
-            return self.get_next_question(session_id)
-        
-        # Assessment complete
-        return None
     
     def process_response(self, session_id: str, question_id: str, user_response: str) -> Dict[str, Any]:
         """Process a user response and extract relevant data."""
@@ -146,12 +264,15 @@ class AssessmentManager:
         )
         assessment.responses.append(response)
         
+        # Lowercase once for all keyword matching below
+        response_lower = user_response.lower()
+        
         # Extract data points from the response
-        extracted_data = self._extract_data_points(question_id, user_response)
+        extracted_data = self._extract_data_points(question_id, user_response, response_lower)
         assessment.extracted_data.update(extracted_data)
         
         # Update priority score based on response
-        self._update_priority_score(assessment, question_id, user_response)
+        self._update_priority_score(assessment, question_id, response_lower)
         
         # Update completion percentage
         assessment.completion_percentage = self._calculate_completion(assessment)
@@ -204,69 +325,38 @@ class AssessmentManager:
     
     def _get_next_phase(self, current_phase: AssessmentPhase) -> Optional[AssessmentPhase]:
         """Determine the next assessment phase."""
-        phase_order = [
-            AssessmentPhase.INITIAL_SCREENING,
-            AssessmentPhase.PAIN_CHARACTERISTICS,
-            AssessmentPhase.FUNCTIONAL_IMPACT,
-            AssessmentPhase.MEDICAL_HISTORY,
-            AssessmentPhase.LIFESTYLE_FACTORS,
-            AssessmentPhase.FOLLOW_UP
-        ]
-        
-        try:
-            current_index = phase_order.index(current_phase)
-            if current_index < len(phase_order) - 1:
-                return phase_order[current_index + 1]
-        except ValueError:
-            pass
-        
-        return None
+        return NEXT_PHASE.get(current_phase)
     
-    def _extract_data_points(self, question_id: str, response: str) -> Dict[str, Any]:
+    def _extract_data_points(self, question_id: str, response: str, response_lower: str) -> Dict[str, Any]:
         """Extract structured data from user responses."""
         question = self.prompts.get_question_by_id(question_id)
         if not question:
             return {}
         
         extracted = {}
-        response_lower = response.lower()
         
         # Question-specific extraction logic
         if question_id == "pain_severity":
             # Extract numeric pain ratings
-            import re
-            numbers = re.findall(r'\b(\d+)\b', response)
-            if numbers:
-                extracted["pain_level_current"] = int(numbers[0])
+            number = NUMBER_PATTERN.search(response)
+            if number:
+                extracted["pain_level_current"] = int(number.group(1))
         
         elif question_id == "pain_location":
             # Extract body regions mentioned
-            body_regions = [
-                "head", "neck", "shoulder", "arm", "elbow", "wrist", "hand",
-                "chest", "back", "abdomen", "hip", "thigh", "knee", "shin",
-                "ankle", "foot", "spine", "lower back", "upper back"
-            ]
-            mentioned_regions = [region for region in body_regions if region in response_lower]
+            mentioned_regions = [region for region in BODY_REGIONS if region in response_lower]
             if mentioned_regions:
                 extracted["affected_body_regions"] = mentioned_regions
         
         elif question_id == "pain_quality":
             # Extract pain descriptors
-            pain_descriptors = [
-                "sharp", "dull", "burning", "aching", "throbbing", "stabbing",
-                "cramping", "shooting", "tingling", "numbness", "stiffness"
-            ]
-            mentioned_descriptors = [desc for desc in pain_descriptors if desc in response_lower]
+            mentioned_descriptors = [desc for desc in PAIN_DESCRIPTORS if desc in response_lower]
             if mentioned_descriptors:
                 extracted["pain_descriptors"] = mentioned_descriptors
         
         elif question_id == "injury_mechanism":
             # Extract mechanism keywords
-            mechanisms = [
-                "fall", "twist", "lift", "bend", "slip", "trip", "crash",
-                "sports", "accident", "sudden", "gradual", "repetitive"
-            ]
-            mentioned_mechanisms = [mech for mech in mechanisms if mech in response_lower]
+            mentioned_mechanisms = [mech for mech in INJURY_MECHANISMS if mech in response_lower]
             if mentioned_mechanisms:
                 extracted["injury_mechanisms"] = mentioned_mechanisms
         
@@ -276,40 +366,28 @@ class AssessmentManager:
         
         return extracted
     
-    def _update_priority_score(self, assessment: AssessmentData, question_id: str, response: str) -> None:
-        """Update priority score based on responses indicating urgency."""
-        response_lower = response.lower()
-        
+    def _update_priority_score(self, assessment: AssessmentData, question_id: str, response_lower: str) -> None:
+        """Update priority score based on responses indicating urgency (lowercased)."""
         # High priority indicators
-        if any(indicator in response_lower for indicator in [
-            "10", "severe", "unbearable", "worst", "emergency",
-            "numbness", "weakness", "can't move", "tingling",
-            "fever", "nausea", "dizzy", "confused"
-        ]):
+        if HIGH_PRIORITY_PATTERN.search(response_lower):
             assessment.priority_score += 10
         
         # Medium priority indicators
-        elif any(indicator in response_lower for indicator in [
-            "8", "9", "very painful", "difficult", "hard to",
-            "swelling", "bruising", "stiff", "limited"
-        ]):
+        elif MEDIUM_PRIORITY_PATTERN.search(response_lower):
             assessment.priority_score += 5
         
         # Recent onset
-        if question_id == "pain_chief_complaint" and any(word in response_lower for word in [
-            "today", "yesterday", "sudden", "suddenly", "just started"
-        ]):
+        if question_id == "pain_chief_complaint" and RECENT_ONSET_PATTERN.search(response_lower):
             assessment.priority_score += 3
     
     def _calculate_completion(self, assessment: AssessmentData) -> float:
         """Calculate assessment completion percentage."""
-        total_questions = sum(len(questions) for questions in self.prompts.questions.values())
         answered_questions = len(assessment.responses)
-        return min(100.0, (answered_questions / total_questions) * 100)
+        return min(100.0, (answered_questions / self._total_questions) * 100)
     
     def _should_ask_follow_up(self, question_id: str, response: str) -> Optional[str]:
         """Determine if a follow-up question should be asked."""
-        if len(response.split()) < 3:  # Very short response
+        if not THREE_WORDS_PATTERN.search(response):  # Very short response
             return "Could you tell me a bit more about that?"
         
         return self.prompts.get_adaptive_follow_up(question_id, response)
@@ -393,12 +471,7 @@ class AssessmentManager:
         
         # Check responses for red flag keywords
         for response in assessment.responses:
-            response_lower = response.response.lower()
-            if any(flag in response_lower for flag in [
-                "numbness", "weakness", "can't move", "paralysis",
-                "severe headache", "fever", "nausea", "vomiting",
-                "loss of consciousness", "confusion", "chest pain"
-            ]):
+            if RED_FLAG_PATTERN.search(response.response):
                 red_flags.append(f"Red flag identified: {response.response[:100]}...")
         
         return red_flags
@@ -408,5 +481,8 @@ class AssessmentManager:
         question = self.prompts.get_question_by_id(question_id)
         return question.question if question else "Unknown question"
 
-# Singleton instance
-assessment_manager = AssessmentManager()
+# Singleton instance, expiring sessions on the same schedule as the shared store
+assessment_manager = AssessmentManager(
+    max_active_assessments=settings.max_active_assessments,
+    assessment_ttl_seconds=settings.assessment_ttl_seconds
+)
@@ -4,8 +4,9 @@ This module contains structured prompts for gathering detailed injury informatio
 that can be stored, analyzed, and condensed for medical assessment.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+import re
 from enum import Enum
 
 class AssessmentPhase(Enum):
@@ -16,15 +17,31 @@ class AssessmentPhase(Enum):
     LIFESTYLE_FACTORS = "lifestyle_factors"
     FOLLOW_UP = "follow_up"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AssessmentQuestion:
     id: str
     phase: AssessmentPhase
     question: str
-    follow_ups: List[str]
-    data_points: List[str]  # What specific data this question captures
+    follow_ups: Tuple[str, ...]
+    data_points: Tuple[str, ...]  # What specific data this question captures
     priority: int  # 1-5, with 1 being most critical
 
+# Keyword-triggered follow-ups: (case-insensitive substring pattern, follow-up) by question
+FOLLOW_UP_TRIGGERS: Dict[str, Tuple[re.Pattern, str]] = {
+    "pain_severity": (
+        re.compile("10|severe|terrible|worst", re.IGNORECASE),
+        "That sounds very intense. Have you experienced pain this severe before? Have you been able to find anything that helps even a little?"
+    ),
+    "pain_location": (
+        re.compile("back", re.IGNORECASE),
+        "When you say back pain, can you be more specific? Is it in your lower back, middle back, or upper back? Does it go into your legs at all?"
+    ),
+    "injury_mechanism": (
+        re.compile("fall|fell|trip", re.IGNORECASE),
+        "That sounds like it could have been quite a fall. Did you land on a specific part of your body? Did you hit your head at all?"
+    ),
+}
+
 class InjuryAssessmentPrompts:
     """
     Comprehensive injury assessment system that guides users through
@@ -34,6 +51,14 @@ class InjuryAssessmentPrompts:
     def __init__(self):
         self.questions = self._initialize_questions()
         self.system_prompt = self._get_system_prompt()
+        
+        # Lookup indices over all phases, built once
+        self._by_id: Dict[str, AssessmentQuestion] = {}
+        self._by_priority: Dict[int, List[AssessmentQuestion]] = {}
+        for phase_questions in self.questions.values():
+            for question in phase_questions:
+                self._by_id.setdefault(question.id, question)
+                self._by_priority.setdefault(question.priority, []).append(question)
     
     def _get_system_prompt(self) -> str:
         return """
@@ -87,12 +112,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="pain_chief_complaint",
                     phase=AssessmentPhase.INITIAL_SCREENING,
                     question="Can you tell me about your main concern today? What's bothering you the most?",
-                    follow_ups=[
+                    follow_ups=(
                         "When did this problem first start?",
                         "Has it been getting better, worse, or staying the same?",
                         "What do you think might have caused this?"
-                    ],
-                    data_points=["chief_complaint", "onset_timeline", "progression", "suspected_cause"],
+                    ),
+                    data_points=("chief_complaint", "onset_timeline", "progression", "suspected_cause"),
                     priority=1
                 ),
                 
@@ -100,12 +125,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="pain_location",
                     phase=AssessmentPhase.INITIAL_SCREENING,
                     question="Can you show me or describe exactly where you're experiencing pain or discomfort?",
-                    follow_ups=[
+                    follow_ups=(
                         "Does the pain stay in one place or does it move around?",
                         "Does it spread to any other areas of your body?",
                         "Is it deeper inside or more on the surface?"
-                    ],
-                    data_points=["primary_location", "radiation_pattern", "pain_depth", "affected_areas"],
+                    ),
+                    data_points=("primary_location", "radiation_pattern", "pain_depth", "affected_areas"),
                     priority=1
                 ),
                 
@@ -113,12 +138,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="pain_severity",
                     phase=AssessmentPhase.INITIAL_SCREENING,
                     question="On a scale of 0 to 10, where 0 is no pain and 10 is the worst pain imaginable, how would you rate your pain right now?",
-                    follow_ups=[
+                    follow_ups=(
                         "What's the worst it's been in the past week?",
                         "What's the best it's been?",
                         "How would you rate your average pain level?"
-                    ],
-                    data_points=["current_pain_level", "worst_pain_level", "best_pain_level", "average_pain_level"],
+                    ),
+                    data_points=("current_pain_level", "worst_pain_level", "best_pain_level", "average_pain_level"),
                     priority=1
                 )
             ],
@@ -128,12 +153,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="pain_quality",
                     phase=AssessmentPhase.PAIN_CHARACTERISTICS,
                     question="How would you describe the pain? For example: sharp, dull, burning, aching, throbbing, stabbing, cramping, or something else?",
-                    follow_ups=[
+                    follow_ups=(
                         "Does the type of pain change throughout the day?",
                         "Are there different types of pain in different areas?",
                         "Does it feel like any pain you've had before?"
-                    ],
-                    data_points=["pain_descriptors", "pain_variability", "pain_patterns", "pain_familiarity"],
+                    ),
+                    data_points=("pain_descriptors", "pain_variability", "pain_patterns", "pain_familiarity"),
                     priority=2
                 ),
                 
@@ -141,12 +166,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="pain_timing",
                     phase=AssessmentPhase.PAIN_CHARACTERISTICS,
                     question="When do you notice the pain most? Is it constant or does it come and go?",
-                    follow_ups=[
+                    follow_ups=(
                         "What time of day is it typically worst?",
                         "How long do pain episodes last?",
                         "Do you wake up with pain or does it develop during the day?"
-                    ],
-                    data_points=["pain_frequency", "circadian_pattern", "episode_duration", "onset_timing"],
+                    ),
+                    data_points=("pain_frequency", "circadian_pattern", "episode_duration", "onset_timing"),
                     priority=2
                 ),
                 
@@ -154,12 +179,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="triggers_relievers",
                     phase=AssessmentPhase.PAIN_CHARACTERISTICS,
                     question="What makes your pain better? What makes it worse?",
-                    follow_ups=[
+                    follow_ups=(
                         "Does movement help or hurt?",
                         "How about rest, heat, cold, or specific positions?",
                         "Have you tried any medications or treatments?"
-                    ],
-                    data_points=["aggravating_factors", "relieving_factors", "positional_effects", "treatment_responses"],
+                    ),
+                    data_points=("aggravating_factors", "relieving_factors", "positional_effects", "treatment_responses"),
                     priority=2
                 )
             ],
@@ -169,12 +194,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="daily_activities",
                     phase=AssessmentPhase.FUNCTIONAL_IMPACT,
                     question="How is this pain affecting your daily activities? What can't you do now that you could do before?",
-                    follow_ups=[
+                    follow_ups=(
                         "How about work or school activities?",
                         "What about household tasks?",
                         "Any changes in your sleep?"
-                    ],
-                    data_points=["functional_limitations", "work_impact", "home_activities", "sleep_disturbance"],
+                    ),
+                    data_points=("functional_limitations", "work_impact", "home_activities", "sleep_disturbance"),
                     priority=2
                 ),
                 
@@ -182,12 +207,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="mobility_assessment",
                     phase=AssessmentPhase.FUNCTIONAL_IMPACT,
                     question="Tell me about your mobility. Any difficulty walking, climbing stairs, or moving around?",
-                    follow_ups=[
+                    follow_ups=(
                         "Do you use any assistive devices?",
                         "How far can you walk comfortably?",
                         "Any balance or coordination issues?"
-                    ],
-                    data_points=["mobility_status", "walking_tolerance", "assistive_devices", "balance_issues"],
+                    ),
+                    data_points=("mobility_status", "walking_tolerance", "assistive_devices", "balance_issues"),
                     priority=2
                 ),
                 
@@ -195,12 +220,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="psychological_impact",
                     phase=AssessmentPhase.FUNCTIONAL_IMPACT,
                     question="How is this condition affecting you emotionally? Are you feeling frustrated, worried, or down about it?",
-                    follow_ups=[
+                    follow_ups=(
                         "Has it changed your mood or energy levels?",
                         "Are you worried about the future?",
                         "How is it affecting your relationships?"
-                    ],
-                    data_points=["emotional_impact", "mood_changes", "anxiety_levels", "social_impact"],
+                    ),
+                    data_points=("emotional_impact", "mood_changes", "anxiety_levels", "social_impact"),
                     priority=3
                 )
             ],
@@ -210,12 +235,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="injury_mechanism",
                     phase=AssessmentPhase.MEDICAL_HISTORY,
                     question="Can you walk me through exactly how this injury happened? What were you doing when it started?",
-                    follow_ups=[
+                    follow_ups=(
                         "Was there a specific moment when you felt something wrong?",
                         "Did you hear or feel anything unusual (like a pop, crack, or tear)?",
                         "Were you able to continue what you were doing?"
-                    ],
-                    data_points=["mechanism_of_injury", "immediate_symptoms", "audible_signs", "immediate_function"],
+                    ),
+                    data_points=("mechanism_of_injury", "immediate_symptoms", "audible_signs", "immediate_function"),
                     priority=1
                 ),
                 
@@ -223,12 +248,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="previous_injuries",
                     phase=AssessmentPhase.MEDICAL_HISTORY,
                     question="Have you had any previous injuries to this area or similar problems anywhere else?",
-                    follow_ups=[
+                    follow_ups=(
                         "How were previous injuries treated?",
                         "Did they heal completely?",
                         "Any ongoing issues from past injuries?"
-                    ],
-                    data_points=["injury_history", "previous_treatments", "residual_effects", "recurrence_pattern"],
+                    ),
+                    data_points=("injury_history", "previous_treatments", "residual_effects", "recurrence_pattern"),
                     priority=3
                 ),
                 
@@ -236,12 +261,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="medical_conditions",
                     phase=AssessmentPhase.MEDICAL_HISTORY,
                     question="Do you have any medical conditions or take any medications I should know about?",
-                    follow_ups=[
+                    follow_ups=(
                         "Any conditions affecting bones, joints, or muscles?",
                         "Any medications for pain or inflammation?",
                         "Any allergies to medications?"
-                    ],
-                    data_points=["medical_conditions", "current_medications", "allergies", "relevant_conditions"],
+                    ),
+                    data_points=("medical_conditions", "current_medications", "allergies", "relevant_conditions"),
                     priority=3
                 )
             ],
@@ -251,12 +276,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="activity_level",
                     phase=AssessmentPhase.LIFESTYLE_FACTORS,
                     question="Tell me about your typical activity level. Do you exercise regularly, play sports, or have a physically demanding job?",
-                    follow_ups=[
+                    follow_ups=(
                         "What types of activities do you enjoy?",
                         "How has your activity level changed since this started?",
                         "What are your fitness goals?"
-                    ],
-                    data_points=["baseline_activity", "exercise_habits", "sports_participation", "fitness_goals"],
+                    ),
+                    data_points=("baseline_activity", "exercise_habits", "sports_participation", "fitness_goals"),
                     priority=4
                 ),
                 
@@ -264,12 +289,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="ergonomics_lifestyle",
                     phase=AssessmentPhase.LIFESTYLE_FACTORS,
                     question="Tell me about your work setup and daily postures. Do you sit at a desk, do physical labor, or something else?",
-                    follow_ups=[
+                    follow_ups=(
                         "How many hours do you spend in the same position?",
                         "What's your typical sleep position and mattress like?",
                         "Any repetitive motions in your daily routine?"
-                    ],
-                    data_points=["work_ergonomics", "postural_habits", "sleep_setup", "repetitive_activities"],
+                    ),
+                    data_points=("work_ergonomics", "postural_habits", "sleep_setup", "repetitive_activities"),
                     priority=4
                 ),
                 
@@ -277,12 +302,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="stress_factors",
                     phase=AssessmentPhase.LIFESTYLE_FACTORS,
                     question="Are there any stressors in your life that might be affecting your healing or pain levels?",
-                    follow_ups=[
+                    follow_ups=(
                         "How do you typically handle stress?",
                         "Have you noticed stress affecting your pain?",
                         "What support systems do you have?"
-                    ],
-                    data_points=["stress_levels", "coping_mechanisms", "stress_pain_relationship", "support_systems"],
+                    ),
+                    data_points=("stress_levels", "coping_mechanisms", "stress_pain_relationship", "support_systems"),
                     priority=4
                 )
             ],
@@ -292,12 +317,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="treatment_goals",
                     phase=AssessmentPhase.FOLLOW_UP,
                     question="What are your main goals for treatment? What would you most like to be able to do again?",
-                    follow_ups=[
+                    follow_ups=(
                         "What's most important to you in your recovery?",
                         "Are there specific activities you're hoping to return to?",
                         "What would successful treatment look like to you?"
-                    ],
-                    data_points=["treatment_goals", "functional_priorities", "recovery_expectations", "success_criteria"],
+                    ),
+                    data_points=("treatment_goals", "functional_priorities", "recovery_expectations", "success_criteria"),
                     priority=2
                 ),
                 
@@ -305,12 +330,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="red_flag_screening",
                     phase=AssessmentPhase.FOLLOW_UP,
                     question="Have you experienced any numbness, tingling, weakness, or loss of function? Any fever, nausea, or other symptoms?",
-                    follow_ups=[
+                    follow_ups=(
                         "Any changes in bowel or bladder function?",
                         "Any severe headaches or dizziness?",
                         "Any symptoms that seem unrelated but started around the same time?"
-                    ],
-                    data_points=["neurological_symptoms", "systemic_symptoms", "red_flag_indicators", "associated_symptoms"],
+                    ),
+                    data_points=("neurological_symptoms", "systemic_symptoms", "red_flag_indicators", "associated_symptoms"),
                     priority=1
                 ),
                 
@@ -318,12 +343,12 @@ not providing medical diagnosis or treatment recommendations.
                     id="additional_concerns",
                     phase=AssessmentPhase.FOLLOW_UP,
                     question="Is there anything else about your condition that you think I should know? Any concerns or questions you have?",
-                    follow_ups=[
+                    follow_ups=(
                         "What worries you most about this condition?",
                         "Is there anything that doesn't seem to fit the pattern?",
                         "What questions do you have about your condition?"
-                    ],
-                    data_points=["additional_symptoms", "patient_concerns", "unusual_features", "questions"],
+                    ),
+                    data_points=("additional_symptoms", "patient_concerns", "unusual_features", "questions"),
                     priority=3
                 )
             ]
@@ -335,18 +360,11 @@ not providing medical diagnosis or treatment recommendations.
     
     def get_priority_questions(self, priority: int) -> List[AssessmentQuestion]:
         """Get all questions of a specific priority level."""
-        all_questions = []
-        for phase_questions in self.questions.values():
-            all_questions.extend([q for q in phase_questions if q.priority == priority])
-        return all_questions
+        return list(self._by_priority.get(priority, []))
     
     def get_question_by_id(self, question_id: str) -> Optional[AssessmentQuestion]:
         """Get a specific question by its ID."""
-        for phase_questions in self.questions.values():
-            for question in phase_questions:
-                if question.id == question_id:
-                    return question
-        return None
+        return self._by_id.get(question_id)
     
     def get_adaptive_follow_up(self, question_id: str, user_response: str) -> str:
         """
@@ -358,16 +376,9 @@ not providing medical diagnosis or treatment recommendations.
             return "Can you tell me more about that?"
         
         # Simple keyword-based follow-up selection
-        response_lower = user_response.lower()
-        
-        if question_id == "pain_severity" and any(word in response_lower for word in ["10", "severe", "terrible", "worst"]):
-            return "That sounds very intense. Have you experienced pain this severe before? Have you been able to find anything that helps even a little?"
-        
-        elif question_id == "pain_location" and "back" in response_lower:
-            return "When you say back pain, can you be more specific? Is it in your lower back, middle back, or upper back? Does it go into your legs at all?"
-        
-        elif question_id == "injury_mechanism" and any(word in response_lower for word in ["fall", "fell", "trip"]):
-            return "That sounds like it could have been quite a fall. Did you land on a specific part of your body? Did you hit your head at all?"
+        trigger = FOLLOW_UP_TRIGGERS.get(question_id)
+        if trigger and trigger[0].search(user_response):
+            return trigger[1]
         
         # Default to the first follow-up question if no specific match
         return question.follow_ups[0] if question.follow_ups else "Can you tell me more about that?"
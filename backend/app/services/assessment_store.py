@@ -0,0 +1,141 @@
+"""
+Assessment State Store
+
+This module shares injury assessment state between workers by mirroring
+the assessment manager's in-process sessions to Redis with an expiry.
+Without a configured Redis URL the store is a no-op and assessments live
+only in the current process.
+"""
+
+from typing import Any, Callable, Optional, TypeVar
+
+from app.prompts import AssessmentData, assessment_manager
+from app.settings import settings
+
+ASSESSMENT_KEY_PREFIX = "assess:"
+
+# Attempts at a read-modify-write before giving up on a contended session
+ASSESSMENT_UPDATE_ATTEMPTS = 5
+
+T = TypeVar("T")
+
+
+class AssessmentConflictError(RuntimeError):
+    """Raised when a session keeps changing underneath an update."""
+
+
+class AssessmentStore:
+    """
+    Redis-backed persistence for assessment sessions.
+
+    Each session is stored as one JSON document under assess:<session_id>
+    and its expiry is refreshed on every save, so abandoned assessments are
+    dropped automatically. Updates use WATCH/MULTI so concurrent workers
+    retry instead of overwriting each other's changes.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, ttl_seconds: int = 3600) -> None:
+        """
+        Initialize the assessment store.
+
+        Args:
+            redis_url: Redis connection URL, or None to keep state in-process
+            ttl_seconds: Seconds an assessment is kept after its last update
+        """
+        self.ttl_seconds = ttl_seconds
+        self._redis: Any = None
+        self._watch_error: Any = None
+
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+
+                self._redis = redis.from_url(redis_url)
+                self._watch_error = redis.WatchError
+            except ImportError:
+                print("⚠️ redis package not installed - assessment state stays in-process")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether assessment state is shared through Redis."""
+        return self._redis is not None
+
+    async def load(self, session_id: str) -> None:
+        """
+        Refresh the assessment manager's copy of a session from Redis.
+
+        A session missing from Redis has expired there, so the local copy
+        is dropped as well instead of outliving the configured TTL.
+
+        Args:
+            session_id: Assessment session identifier
+        """
+        if not self.enabled:
+            return
+
+        payload = await self._redis.get(ASSESSMENT_KEY_PREFIX + session_id)
+        self._apply(session_id, payload)
+
+    async def update(self, session_id: str, mutate: Callable[[], T]) -> T:
+        """
+        Apply a change to a session atomically across workers.
+
+        The session is loaded under WATCH, changed in the assessment manager
+        by mutate and written back in a MULTI/EXEC transaction. If another
+        worker saved the session in between, the transaction is discarded
+        and the update is retried on the fresh copy.
+
+        Args:
+            session_id: Assessment session identifier
+            mutate: Synchronous function that changes the session through the
+                assessment manager; it may run more than once
+
+        Returns:
+            The return value of the successful mutate call
+
+        Raises:
+            AssessmentConflictError: If every attempt hit a concurrent write
+        """
+        if not self.enabled:
+            return mutate()
+
+        key = ASSESSMENT_KEY_PREFIX + session_id
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for _ in range(ASSESSMENT_UPDATE_ATTEMPTS):
+                try:
+                    await pipe.watch(key)
+                    self._apply(session_id, await pipe.get(key))
+
+                    result = mutate()
+
+                    assessment = assessment_manager.active_assessments.get(session_id)
+                    pipe.multi()
+                    if assessment is not None:
+                        pipe.set(key, assessment.to_json(), ex=self.ttl_seconds)
+                    await pipe.execute()
+                    return result
+                except self._watch_error:
+                    continue
+
+        raise AssessmentConflictError(
+            f"Assessment {session_id} changed concurrently {ASSESSMENT_UPDATE_ATTEMPTS} times"
+        )
+
+    @staticmethod
+    def _apply(session_id: str, payload: Optional[bytes]) -> None:
+        if payload is None:
+            assessment_manager.active_assessments.pop(session_id)
+        else:
+            assessment_manager.active_assessments[session_id] = AssessmentData.from_json(payload)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool, e.g. on shutdown."""
+        if self.enabled:
+            await self._redis.aclose()
+
+
+# Global store instance shared by chat endpoints
+assessment_store = AssessmentStore(
+    redis_url=settings.redis_url,
+    ttl_seconds=settings.assessment_ttl_seconds
+)
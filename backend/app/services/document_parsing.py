@@ -0,0 +1,95 @@
+"""
+Document parsing for knowledge base ingestion.
+
+Loads supported document formats and splits them into chunk texts. The
+module only depends on the document loaders and the text splitter, so
+ingestion worker processes that import it to run parse_and_chunk start
+without loading the database, embeddings or web application modules.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import (
+    PyPDFLoader,
+    CSVLoader,
+    JSONLoader
+)
+
+
+def build_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Build the text splitter used to chunk knowledge base content."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+
+
+def read_text_document(file_path: Path) -> List[str]:
+    """Read a plain text or Markdown file as a single UTF-8 text."""
+    return [file_path.read_text(encoding='utf-8')]
+
+
+def load_pdf_document(file_path: Path) -> List[str]:
+    """Extract the text of each page of a PDF."""
+    return [page.page_content for page in PyPDFLoader(str(file_path)).load()]
+
+
+def load_csv_document(file_path: Path) -> List[str]:
+    """Render each CSV row as a text."""
+    return [row.page_content for row in CSVLoader(str(file_path)).load()]
+
+
+def load_json_document(file_path: Path) -> List[str]:
+    """Extract the texts of a JSON document."""
+    return [document.page_content for document in JSONLoader(str(file_path)).load()]
+
+
+# Parser for each supported file extension, returning the document's texts
+DOCUMENT_PARSERS: Dict[str, Callable[[Path], List[str]]] = {
+    '.pdf': load_pdf_document,
+    '.txt': read_text_document,
+    '.md': read_text_document,
+    '.csv': load_csv_document,
+    '.json': load_json_document,
+}
+
+# File extensions accepted for ingestion
+SUPPORTED_EXTENSIONS = frozenset(DOCUMENT_PARSERS)
+
+
+# Per-process splitter used by parse_and_chunk
+_worker_text_splitter: Optional[RecursiveCharacterTextSplitter] = None
+
+
+def parse_and_chunk(file_path: str) -> List[str]:
+    """
+    Load a document and split it into chunk texts.
+    
+    This is the CPU-bound part of document ingestion. It is a top-level
+    function taking and returning plain values so that it can run in a
+    worker process.
+    
+    Args:
+        file_path: Path to the document file
+        
+    Returns:
+        Text of each chunk, in document order
+    """
+    global _worker_text_splitter
+    
+    if _worker_text_splitter is None:
+        _worker_text_splitter = build_text_splitter()
+    
+    path = Path(file_path)
+    parser = DOCUMENT_PARSERS.get(path.suffix.lower())
+    if parser is None:
+        raise ValueError(f"Unsupported file type: {path.suffix.lower()}")
+    
+    return [
+        chunk
+        for text in parser(path)
+        for chunk in _worker_text_splitter.split_text(text)
+    ]
@@ -0,0 +1,305 @@
+"""
+Embedding Service
+
+This module provides the embedding client used across the backend, either
+OpenAI's API or a local ONNX model, fronted by an in-process LRU cache so
+identical texts are only embedded once and a micro-batcher that coalesces
+concurrent requests into single calls.
+"""
+
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.services.http_client import http_client
+from app.settings import settings
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings computed in-process with a fastembed ONNX model.
+    
+    The model is loaded on first use and shared by all callers. Inference
+    runs in a worker thread so it does not block the event loop.
+    """
+
+    def __init__(self, model_name: str = "BAAI/bge-small-en-v1.5", batch_size: int = 64) -> None:
+        """
+        Initialize the local embeddings client.
+
+        Args:
+            model_name: fastembed model to load
+            batch_size: Number of texts per inference batch
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model: Any = None
+        self._model_lock = threading.Lock()
+
+    def _get_model(self) -> Any:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from fastembed import TextEmbedding
+
+                    self._model = TextEmbedding(self.model_name)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of texts.
+
+        Args:
+            texts: Text contents to embed
+
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        model = self._get_model()
+        return [vector.tolist() for vector in model.embed(texts, batch_size=self.batch_size)]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text: Text content to embed
+
+        Returns:
+            Embedding vector for the text
+        """
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class EmbeddingCache:
+    """
+    Least-recently-used cache of embedding vectors.
+
+    Entries are keyed by a BLAKE2b digest of the model name and text so the
+    cache never holds the raw content and stays valid across model changes.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        """
+        Initialize the embedding cache.
+
+        Args:
+            maxsize: Maximum number of vectors to keep in memory
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        """
+        Compute the cache key for a text embedded with a given model.
+
+        Args:
+            text: Text content to embed
+            model: Embedding model name
+
+        Returns:
+            Hex digest identifying the text and model
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Look up a cached vector and mark it as recently used.
+
+        Args:
+            key: Cache key from EmbeddingCache.key
+
+        Returns:
+            The cached vector, or None on a miss
+        """
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """
+        Store a vector, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key from EmbeddingCache.key
+            vector: Embedding vector to cache
+        """
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched calls.
+
+    Requests are queued and flushed as one embeddings API call when either
+    the batch is full or the oldest request has waited max_latency seconds.
+    """
+
+    def __init__(
+        self,
+        client: Embeddings,
+        max_batch: int = 64,
+        max_latency: float = 0.015
+    ) -> None:
+        """
+        Initialize the embedding batcher.
+
+        Args:
+            client: Embeddings client used for the batched calls
+            max_batch: Maximum number of texts per API call
+            max_latency: Maximum time in seconds a request waits for a batch
+        """
+        self.client = client
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text as part of the next batch.
+
+        Args:
+            text: Text content to embed
+
+        Returns:
+            Embedding vector for the text
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_latency, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._embed_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await self.client.aembed_documents([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+# Shared embeddings client, cache and batcher
+if settings.embeddings_backend == "fastembed":
+    embedding_model_name = settings.local_embedding_model
+    embeddings: Embeddings = LocalEmbeddings(
+        model_name=embedding_model_name,
+        batch_size=settings.embedding_batch_size
+    )
+else:
+    embedding_model_name = settings.embedding_model
+    embeddings = OpenAIEmbeddings(
+        model=embedding_model_name,
+        openai_api_key=settings.openai_api_key,
+        http_async_client=http_client
+    )
+embedding_cache = EmbeddingCache(maxsize=settings.embedding_cache_size)
+embedding_batcher = EmbeddingBatcher(
+    embeddings,
+    max_batch=settings.embedding_batch_size,
+    max_latency=settings.embedding_batch_latency_ms / 1000
+)
+
+
+async def embed_text(text: str) -> List[float]:
+    """
+    Embed a single text, serving repeated content from the LRU cache.
+
+    Cache misses are queued on the shared batcher so that concurrent
+    requests share a single embeddings API call.
+
+    Args:
+        text: Text content to embed
+
+    Returns:
+        Embedding vector for the text
+    """
+    key = EmbeddingCache.key(text, embedding_model_name)
+    vector = embedding_cache.get(key)
+
+    if vector is None:
+        vector = await embedding_batcher.embed(text)
+        embedding_cache.put(key, vector)
+
+    return vector
+
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed several texts at once, serving repeated content from the LRU cache.
+
+    All distinct cache misses are sent in a single embeddings API call.
+
+    Args:
+        texts: Text contents to embed
+
+    Returns:
+        Embedding vectors in the same order as the texts
+    """
+    keys = [EmbeddingCache.key(text, embedding_model_name) for text in texts]
+    vectors: List[Optional[List[float]]] = [embedding_cache.get(key) for key in keys]
+
+    # First index of each distinct missing text, so repeats are embedded once
+    missing: Dict[str, int] = {}
+    for index, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(keys[index], index)
+
+    if missing:
+        new_vectors = await embeddings.aembed_documents(
+            [texts[index] for index in missing.values()]
+        )
+        embedded = dict(zip(missing, new_vectors))
+        for key, vector in embedded.items():
+            embedding_cache.put(key, vector)
+        for index, key in enumerate(keys):
+            if vectors[index] is None:
+                vectors[index] = embedded[key]
+
+    return vectors
@@ -0,0 +1,26 @@
+"""
+Shared HTTP Client
+
+This module provides the process-wide async HTTP client used by the OpenAI
+integrations, so chat and embedding calls reuse pooled HTTP/2 connections
+instead of each client opening its own.
+"""
+
+import httpx
+
+from app.settings import settings
+
+# Shared async client for outbound API calls
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(settings.http_timeout_seconds),
+    limits=httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+    ),
+)
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections."""
+    await http_client.aclose()
@@ -4,46 +4,73 @@ Processes various document formats into vector embeddings.
 """
 
 import asyncio
+import hashlib
 import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Set
 
 import aiofiles
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    JSONLoader
-)
-from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import func
 from sqlmodel import select
 
 from app.db.core import AsyncSessionLocal
 from app.db.models import Message, Embedding, Thread, MessageRole
-from app.settings import settings
+from app.db.vector import copy_knowledge_chunks
+from app.services import embeddings as embedding_service
+from app.services.document_parsing import (
+    SUPPORTED_EXTENSIONS,
+    build_text_splitter,
+    parse_and_chunk
+)
+
+
+# Chunks embedded per embeddings API call during ingestion
+INGESTION_EMBEDDING_BATCH_SIZE = 256
+
+# Threads parsing and chunking documents for each ingestion service
+INGESTION_PARSE_THREADS = 4
+
+# Documents ingested at once by ingest_directory
+INGEST_DIRECTORY_CONCURRENCY = 8
+
+# Content hashes looked up per query when reusing stored embeddings
+CONTENT_HASH_LOOKUP_BATCH_SIZE = 1000
+
+
+def content_hash(text: str) -> bytes:
+    """
+    Hash a chunk's content to find identical chunks already embedded.
+    
+    Args:
+        text: Chunk text
+        
+    Returns:
+        SHA-256 digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode('utf-8')).digest()
 
 
 class DocumentIngestionService:
     """Service for ingesting medical documents into the RAG knowledge base."""
     
     def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=settings.openai_api_key
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        self.embeddings = embedding_service.embeddings
+        self.text_splitter = build_text_splitter()
+        
+        # Bounded pool for the blocking loaders and splitter, so concurrent
+        # ingestion cannot take over the event loop's default executor
+        self.parse_executor = ThreadPoolExecutor(
+            max_workers=INGESTION_PARSE_THREADS,
+            thread_name_prefix="ingestion-parse"
         )
     
     async def ingest_document(
         self, 
         file_path: Path, 
         source_type: str = "knowledge_base",
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        executor: Optional[Executor] = None
     ) -> List[str]:
         """
         Ingest a single document into the knowledge base.
@@ -52,91 +79,87 @@ class DocumentIngestionService:
             file_path: Path to the document file
             source_type: Type of source (knowledge_base, clinical_guideline, etc.)
             metadata: Additional metadata for the document
+            executor: Executor for parsing and chunking (defaults to the
+                service's parsing thread pool)
             
         Returns:
             List of message IDs that were created
         """
-        # Load document based on file type
-        loader = self._get_loader(file_path)
-        documents = loader.load()
+        # Load and split the document off the event loop
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(
+            executor or self.parse_executor, parse_and_chunk, str(file_path)
+        )
         
-        # Split into chunks
-        chunks = self.text_splitter.split_documents(documents)
+        # Embed all chunks up front in batched calls
+        content_hashes = [content_hash(chunk) for chunk in chunks]
+        embedding_vectors = await self._generate_embeddings(chunks, content_hashes)
         
-        # Create a thread for this document
-        thread_id = str(uuid.uuid4())
-        thread_title = f"{source_type}: {file_path.stem}"
+        knowledge_chunks = [
+            (uuid.uuid4(), chunk, chunk_hash, embedding_vector)
+            for chunk, chunk_hash, embedding_vector in zip(chunks, content_hashes, embedding_vectors)
+        ]
         
-        async with AsyncSessionLocal() as session:
-            # Create thread
-            thread = Thread(
-                id=thread_id,
-                title=thread_title,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            session.add(thread)
-            
-            message_ids = []
-            
-            # Process each chunk
-            for i, chunk in enumerate(chunks):
-                # Create message for the chunk
-                message_id = str(uuid.uuid4())
-                message = Message(
-                    id=message_id,
-                    thread_id=thread_id,
-                    role=MessageRole.SYSTEM,  # Knowledge base content is system role
-                    content=chunk.page_content,
-                    created_at=datetime.utcnow()
-                )
-                session.add(message)
-                message_ids.append(message_id)
-                
-                # Generate embedding
-                embedding_vector = await self._generate_embedding(chunk.page_content)
-                
-                # Store embedding
-                embedding_id = str(uuid.uuid4())
-                embedding = Embedding(
-                    id=embedding_id,
-                    message_id=message_id,
-                    vector=embedding_vector,
-                    created_at=datetime.utcnow()
-                )
-                session.add(embedding)
-            
-            await session.commit()
-            return message_ids
+        # Store a thread for this document with its messages and embeddings
+        # streamed through COPY
+        await copy_knowledge_chunks(
+            uuid.uuid4(),
+            f"{source_type}: {file_path.stem}",
+            knowledge_chunks
+        )
+        
+        return [str(message_id) for message_id, _, _, _ in knowledge_chunks]
     
     async def ingest_directory(
         self, 
         directory_path: Path,
-        source_type: str = "knowledge_base"
+        source_type: str = "knowledge_base",
+        concurrency: int = INGEST_DIRECTORY_CONCURRENCY,
+        executor: Optional[Executor] = None
     ) -> Dict[str, List[str]]:
         """
         Ingest all supported documents in a directory.
         
+        Documents are ingested concurrently, at most concurrency at a time,
+        so parsing, embedding calls and database writes of different files
+        overlap.
+        
         Args:
             directory_path: Path to directory containing documents
             source_type: Type of source for all documents
+            concurrency: Maximum number of documents ingested at once
+            executor: Executor for parsing and chunking (defaults to the
+                service's parsing thread pool)
             
         Returns:
             Dictionary mapping file names to message IDs
         """
-        results = {}
-        supported_extensions = {'.pdf', '.txt', '.csv', '.json', '.md'}
+        semaphore = asyncio.Semaphore(concurrency)
         
-        for file_path in directory_path.rglob('*'):
-            if file_path.suffix.lower() in supported_extensions:
+        async def ingest_file(file_path: Path) -> Optional[List[str]]:
+            async with semaphore:
                 try:
-                    message_ids = await self.ingest_document(file_path, source_type)
-                    results[file_path.name] = message_ids
-                    print(f"✅ Ingested: {file_path.name} ({len(message_ids)} chunks)")
+                    message_ids = await self.ingest_document(
+                        file_path, source_type, executor=executor
+                    )
                 except Exception as e:
                     print(f"❌ Failed to ingest {file_path.name}: {e}")
-                    
-        return results
+                    return None
+            
+            print(f"✅ Ingested: {file_path.name} ({len(message_ids)} chunks)")
+            return message_ids
+        
+        file_paths = [
+            file_path for file_path in directory_path.rglob('*')
+            if file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+        ]
+        outcomes = await asyncio.gather(*(ingest_file(file_path) for file_path in file_paths))
+        
+        return {
+            file_path.name: message_ids
+            for file_path, message_ids in zip(file_paths, outcomes)
+            if message_ids is not None
+        }
     
     async def ingest_medical_guidelines(self, guidelines_data: List[Dict]) -> List[str]:
         """
@@ -148,107 +171,146 @@ class DocumentIngestionService:
         Returns:
             List of message IDs created
         """
-        thread_id = str(uuid.uuid4())
+        thread_id = uuid.uuid4()
+        contents = []
         
-        async with AsyncSessionLocal() as session:
-            # Create thread for guidelines
-            thread = Thread(
-                id=thread_id,
-                title="Medical Guidelines Knowledge Base",
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            session.add(thread)
-            
-            message_ids = []
-            
-            for guideline in guidelines_data:
-                # Create structured content
-                content = f"""
+        for guideline in guidelines_data:
+            # Create structured content
+            contents.append(f"""
 Title: {guideline.get('title', 'Unknown')}
 Category: {guideline.get('category', 'General')}
 Content: {guideline.get('content', '')}
 Last Updated: {guideline.get('last_updated', 'Unknown')}
-"""
-                
-                # Split into chunks if content is large
-                chunks = self.text_splitter.split_text(content)
-                
-                for chunk in chunks:
-                    message_id = str(uuid.uuid4())
-                    message = Message(
-                        id=message_id,
-                        thread_id=thread_id,
-                        role=MessageRole.SYSTEM,
-                        content=chunk,
-                        created_at=datetime.utcnow()
-                    )
-                    session.add(message)
-                    message_ids.append(message_id)
-                    
-                    # Generate and store embedding
-                    embedding_vector = await self._generate_embedding(chunk)
-                    embedding_id = str(uuid.uuid4())
-                    embedding = Embedding(
-                        id=embedding_id,
-                        message_id=message_id,
-                        vector=embedding_vector,
-                        created_at=datetime.utcnow()
-                    )
-                    session.add(embedding)
-            
-            await session.commit()
-            return message_ids
+""")
+        
+        # Split into chunks if content is large, off the event loop
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(
+            self.parse_executor, self._split_contents, contents
+        )
+        
+        # Embed the chunks of all guidelines together in batched calls
+        content_hashes = [content_hash(chunk) for chunk in chunks]
+        embedding_vectors = await self._generate_embeddings(chunks, content_hashes)
+        knowledge_chunks = [
+            (uuid.uuid4(), chunk, chunk_hash, embedding_vector)
+            for chunk, chunk_hash, embedding_vector in zip(chunks, content_hashes, embedding_vectors)
+        ]
+        
+        # Store the thread, messages and embeddings with COPY
+        await copy_knowledge_chunks(
+            thread_id,
+            "Medical Guidelines Knowledge Base",
+            knowledge_chunks
+        )
+        
+        return [str(message_id) for message_id, _, _, _ in knowledge_chunks]
     
-    def _get_loader(self, file_path: Path):
-        """Get appropriate document loader based on file extension."""
-        extension = file_path.suffix.lower()
-        
-        if extension == '.pdf':
-            return PyPDFLoader(str(file_path))
-        elif extension in ['.txt', '.md']:
-            return TextLoader(str(file_path), encoding='utf-8')
-        elif extension == '.csv':
-            return CSVLoader(str(file_path))
-        elif extension == '.json':
-            return JSONLoader(str(file_path))
-        else:
-            raise ValueError(f"Unsupported file type: {extension}")
+    def _split_contents(self, contents: List[str]) -> List[str]:
+        """Split texts into chunk texts, in order."""
+        return [
+            chunk
+            for content in contents
+            for chunk in self.text_splitter.split_text(content)
+        ]
     
-    async def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI embeddings."""
-        # Run embedding generation in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            lambda: self.embeddings.embed_query(text)
-        )
+    async def _generate_embeddings(
+        self,
+        texts: List[str],
+        content_hashes: List[bytes]
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts with one API call per batch.
+        
+        Texts already stored in the knowledge base reuse their stored
+        vector, and repeated texts are only embedded once.
+        
+        Args:
+            texts: Text contents to embed
+            content_hashes: content_hash() of each text
+            
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        vectors = await self._find_stored_embeddings(set(content_hashes))
+        
+        # One text per distinct hash that has no stored vector
+        missing: Dict[bytes, str] = {}
+        for text, text_hash in zip(texts, content_hashes):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+        
+        missing_hashes = list(missing)
+        for start in range(0, len(missing_hashes), INGESTION_EMBEDDING_BATCH_SIZE):
+            batch = missing_hashes[start:start + INGESTION_EMBEDDING_BATCH_SIZE]
+            new_vectors = await embedding_service.embed_texts(
+                [missing[text_hash] for text_hash in batch]
+            )
+            vectors.update(zip(batch, new_vectors))
+        
+        return [vectors[text_hash] for text_hash in content_hashes]
+    
+    async def _find_stored_embeddings(self, content_hashes: Set[bytes]) -> Dict[bytes, List[float]]:
+        """
+        Look up the stored vectors of knowledge base chunks by content hash.
+        
+        Args:
+            content_hashes: Hashes of the chunk contents to look up
+            
+        Returns:
+            Stored vector for each hash that was found
+        """
+        hashes = list(content_hashes)
+        vectors = {}
+        
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(hashes), CONTENT_HASH_LOOKUP_BATCH_SIZE):
+                result = await session.execute(
+                    select(Message.content_hash, Embedding.vector)
+                    .join(Embedding, Embedding.message_id == Message.id)
+                    .where(Message.content_hash.in_(
+                        hashes[start:start + CONTENT_HASH_LOOKUP_BATCH_SIZE]
+                    ))
+                    .distinct(Message.content_hash)
+                )
+                vectors.update(result.tuples())
+        
+        return vectors
     
     async def get_knowledge_stats(self) -> Dict[str, int]:
         """Get statistics about the ingested knowledge base."""
-        async with AsyncSessionLocal() as session:
-            # Count system messages (knowledge base entries)
-            system_messages_result = await session.exec(
-                select(Message).where(Message.role == MessageRole.SYSTEM)
+        # Count system messages (knowledge base entries)
+        knowledge_chunks_count = (
+            select(func.count())
+            .select_from(Message)
+            .where(Message.role == MessageRole.SYSTEM)
+            .scalar_subquery()
+        )
+        
+        # Count embeddings
+        embeddings_count = select(func.count()).select_from(Embedding).scalar_subquery()
+        
+        # Count knowledge threads
+        knowledge_threads_count = (
+            select(func.count())
+            .select_from(Thread)
+            .where(
+                Thread.title.contains("knowledge_base") | 
+                Thread.title.contains("Medical Guidelines")
             )
-            system_messages = system_messages_result.all()
-            
-            # Count embeddings
-            embeddings_result = await session.exec(select(Embedding))
-            embeddings = embeddings_result.all()
-            
-            # Count knowledge threads
-            threads_result = await session.exec(
-                select(Thread).where(
-                    Thread.title.contains("knowledge_base") | 
-                    Thread.title.contains("Medical Guidelines")
-                )
+            .scalar_subquery()
+        )
+        
+        # Run all three counts in a single round trip
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(knowledge_chunks_count, embeddings_count, knowledge_threads_count)
             )
-            threads = threads_result.all()
-            
-            return {
-                "knowledge_chunks": len(system_messages),
-                "embeddings": len(embeddings),
-                "knowledge_threads": len(threads),
-                "ready_for_rag": len(embeddings) > 0
-            }
+            knowledge_chunks, embeddings, knowledge_threads = result.one()
+        
+        return {
+            "knowledge_chunks": knowledge_chunks,
+            "embeddings": embeddings,
+            "knowledge_threads": knowledge_threads,
+            "ready_for_rag": embeddings > 0
+        }
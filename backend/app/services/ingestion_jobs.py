@@ -0,0 +1,174 @@
+"""
+Background Ingestion Jobs
+
+This module runs document ingestion outside the HTTP request. Uploads are
+queued as jobs on an in-process asyncio queue and processed by worker tasks
+started with the application; clients poll the job by id for its result.
+"""
+
+import asyncio
+import logging
+import shutil
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Set
+
+from app.services.ingestion import DocumentIngestionService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionJob:
+    """A queued document ingestion and its outcome."""
+    id: str
+    filename: str
+    source_type: str
+    upload_dir: Path
+    status: str = "queued"  # queued, running, completed or failed
+    message_ids: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+class IngestionJobQueue:
+    """
+    In-process queue of document ingestion jobs.
+
+    Jobs are kept in memory so their status can be polled; once more than
+    max_jobs are tracked, the oldest finished jobs are forgotten.
+    """
+
+    def __init__(self, max_jobs: int = 1000) -> None:
+        """
+        Initialize the job queue.
+
+        Args:
+            max_jobs: Maximum number of jobs whose status is kept
+        """
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._queue: "asyncio.Queue[IngestionJob]" = asyncio.Queue()
+        self._workers: Set[asyncio.Task] = set()
+
+    def submit(self, upload_dir: Path, filename: str, source_type: str) -> IngestionJob:
+        """
+        Queue a document for ingestion.
+
+        The job takes ownership of the upload directory and removes it,
+        document included, once processed.
+
+        Args:
+            upload_dir: Temporary directory holding the spooled document
+            filename: Name of the document within upload_dir
+            source_type: Type of source for the document
+
+        Returns:
+            The queued job
+        """
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            filename=filename,
+            source_type=source_type,
+            upload_dir=upload_dir
+        )
+        self._jobs[job.id] = job
+        self._evict_finished()
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Look up a job by id.
+
+        Args:
+            job_id: Job identifier returned by submit
+
+        Returns:
+            The job, or None if it is unknown or was forgotten
+        """
+        return self._jobs.get(job_id)
+
+    def start(
+        self,
+        get_service: Callable[[], Awaitable[DocumentIngestionService]],
+        executor: Optional[Executor] = None,
+        workers: int = 1
+    ) -> None:
+        """
+        Start the worker tasks that process queued jobs.
+
+        Args:
+            get_service: Coroutine function returning the ingestion service
+            executor: Executor for document parsing and chunking
+            workers: Number of jobs processed concurrently
+        """
+        for _ in range(workers):
+            task = asyncio.create_task(self._run(get_service, executor))
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    async def stop(self) -> None:
+        """
+        Cancel the worker tasks, e.g. on shutdown.
+
+        Jobs still waiting in the queue are marked failed and their upload
+        directories removed, since nothing will process them any more.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = "failed"
+            job.error = "Server shut down before the document was ingested"
+            job.finished_at = datetime.now(timezone.utc)
+            shutil.rmtree(job.upload_dir, ignore_errors=True)
+            self._queue.task_done()
+
+    async def _run(
+        self,
+        get_service: Callable[[], Awaitable[DocumentIngestionService]],
+        executor: Optional[Executor]
+    ) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                service = await get_service()
+                job.message_ids = await service.ingest_document(
+                    job.upload_dir / job.filename,
+                    job.source_type,
+                    executor=executor
+                )
+                job.status = "completed"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                logger.exception(f"Failed to ingest {job.filename}")
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                shutil.rmtree(job.upload_dir, ignore_errors=True)
+                self._queue.task_done()
+
+    def _evict_finished(self) -> None:
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+
+# Global job queue shared by the ingestion endpoints
+ingestion_jobs = IngestionJobQueue()
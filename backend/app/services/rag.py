@@ -5,32 +5,89 @@ This module provides the ConversationalRetrievalChain factory for building
 LangChain chains that combine conversation memory with vector-based retrieval.
 """
 
-from typing import Any
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from uuid import UUID
 
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
 from langchain_community.chat_message_histories import PostgresChatMessageHistory
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_openai import ChatOpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.vector import PGVectorRetriever
+from app.db.vector import get_vector_retriever
+from app.services.http_client import http_client
 from app.settings import settings
 
+# Tag attached to the answer-generating LLM so its tokens can be told apart
+# from the question-condensing LLM when consuming chain events
+ANSWER_LLM_TAG = "painar_answer"
 
-def build_chain(thread_id: UUID, session: AsyncSession) -> ConversationalRetrievalChain:
+# Recently used chains keyed by thread id, with the time each was built
+_chain_cache: "OrderedDict[str, Tuple[float, ConversationalRetrievalChain]]" = OrderedDict()
+
+
+def _document_sort_key(document: Document) -> Tuple[str, str]:
+    return (str(document.metadata.get("message_id", "")), document.page_content)
+
+
+class StableOrderRetriever(BaseRetriever):
+    """
+    Retriever wrapper that returns documents in a deterministic order.
+    
+    Similarity ranking reorders the same chunks from query to query, which
+    changes the prompt text the LLM sees. Sorting by a stable key keeps the
+    stuffed context byte-identical whenever the same chunks are retrieved,
+    so providers with prefix caching can reuse the cached context block.
+    """
+    
+    retriever: BaseRetriever
+    
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return sorted(documents, key=_document_sort_key)
+    
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.retriever.ainvoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        return sorted(documents, key=_document_sort_key)
+
+
+def build_chain(
+    thread_id: UUID,
+    session: Optional[AsyncSession] = None
+) -> ConversationalRetrievalChain:
     """
     Factory function to build a ConversationalRetrievalChain for a specific thread.
     
     This chain combines:
     - OpenAI embeddings with text-embedding-three-small model
-    - PGVector retriever with cosine distance returning eight nearest chunks (if available)
+    - PGVector retriever with cosine distance returning eight nearest chunks (if available),
+      in a stable order so repeated context forms a cacheable prompt prefix
     - Conversation buffer memory backed by Postgres chat history
     - ChatOpenAI LLM with GPT four-oh mini and streaming enabled
     
     Args:
         thread_id: Unique identifier for the conversation thread
-        session: Database session for retrieval operations
+        session: Unused; retrieval goes through the shared vector retriever
         
     Returns:
         Configured ConversationalRetrievalChain ready for use
@@ -38,8 +95,8 @@ def build_chain(thread_id: UUID, session: AsyncSession) -> ConversationalRetriev
     
     # Try to initialize the vector retriever for semantic search
     try:
-        vector_retriever = PGVectorRetriever(session)
-        retriever = vector_retriever.as_retriever(k=8)
+        vector_retriever = get_vector_retriever()
+        retriever = StableOrderRetriever(retriever=vector_retriever.as_retriever(k=8))
     except Exception as e:
         # Fallback: Create a simple retriever that returns empty results
         print(f"⚠️ Vector retriever unavailable (pgvector not installed): {e}")
@@ -78,9 +135,22 @@ def build_chain(thread_id: UUID, session: AsyncSession) -> ConversationalRetriev
     llm = ChatOpenAI(
         model_name=settings.model_name,
         openai_api_key=settings.openai_api_key,
+        openai_api_base=settings.llm_base_url,
         streaming=True,
         temperature=0.7,
-        max_tokens=1024
+        max_tokens=1024,
+        tags=[ANSWER_LLM_TAG],
+        http_async_client=http_client
+    )
+    
+    # Question condensing is internal to the chain and never streamed to clients
+    condense_question_llm = ChatOpenAI(
+        model_name=settings.model_name,
+        openai_api_key=settings.openai_api_key,
+        openai_api_base=settings.llm_base_url,
+        temperature=0,
+        max_tokens=256,
+        http_async_client=http_client
     )
     
     # Build the conversational retrieval chain
@@ -88,6 +158,7 @@ def build_chain(thread_id: UUID, session: AsyncSession) -> ConversationalRetriev
         llm=llm,
         retriever=retriever,
         memory=memory,
+        condense_question_llm=condense_question_llm,
         return_source_documents=True,
         verbose=settings.debug,
         chain_type="stuff",  # Concatenate all retrieved documents
@@ -97,6 +168,48 @@ def build_chain(thread_id: UUID, session: AsyncSession) -> ConversationalRetriev
     return chain
 
 
+def get_chain(thread_id: UUID) -> ConversationalRetrievalChain:
+    """
+    Get the conversational chain for a thread, building it on first use.
+    
+    Chains only hold process-wide clients and the thread's Postgres-backed
+    history, so they can be reused across requests. Building a chain opens
+    a synchronous connection for that history, which this avoids on every
+    request after the first. Since each cached chain keeps its connection
+    open, entries expire after the configured TTL and the least recently
+    used chain is evicted when the cache is full.
+    
+    Args:
+        thread_id: Unique identifier for the conversation thread
+        
+    Returns:
+        Configured ConversationalRetrievalChain for the thread
+    """
+    key = str(thread_id)
+    now = time.monotonic()
+    
+    cached = _chain_cache.get(key)
+    if cached is not None and now - cached[0] < settings.chain_cache_ttl_seconds:
+        _chain_cache.move_to_end(key)
+        return cached[1]
+    
+    chain = build_chain(thread_id)
+    _chain_cache[key] = (now, chain)
+    _chain_cache.move_to_end(key)
+    
+    # Drop expired chains from the cold end, then enforce the size limit
+    while _chain_cache:
+        built_at, _ = next(iter(_chain_cache.values()))
+        if now - built_at < settings.chain_cache_ttl_seconds:
+            break
+        _chain_cache.popitem(last=False)
+    
+    if len(_chain_cache) > settings.chain_cache_size:
+        _chain_cache.popitem(last=False)
+    
+    return chain
+
+
 async def run_chain_with_streaming(
     chain: ConversationalRetrievalChain, 
     query: str
@@ -121,6 +234,34 @@ async def run_chain_with_streaming(
         raise RuntimeError(f"Error running chain: {str(e)}")
 
 
+async def stream_chain_tokens(
+    chain: ConversationalRetrievalChain,
+    query: str
+) -> AsyncIterator[str]:
+    """
+    Stream answer tokens from the chain as the LLM emits them.
+    
+    Only tokens produced by the answer LLM are yielded; tokens from the
+    question-condensing step are filtered out by tag.
+    
+    Args:
+        chain: The configured conversational retrieval chain
+        query: User's input query
+        
+    Yields:
+        Answer token strings in generation order
+    """
+    async for event in chain.astream_events({"question": query}, version="v2"):
+        if event["event"] != "on_chat_model_stream":
+            continue
+        if ANSWER_LLM_TAG not in event.get("tags", []):
+            continue
+        
+        token = event["data"]["chunk"].content
+        if token:
+            yield token
+
+
 # TODO: Implement endpoint that proxies to an on-device Llama model
 # This would allow fallback to local inference when OpenAI is unavailable
 # or for privacy-sensitive healthcare conversations
@@ -0,0 +1,131 @@
+"""
+Semantic Response Cache
+
+This module provides an in-process semantic cache that maps query embeddings
+to previously generated answers. Near-duplicate queries are located with
+random-projection locality sensitive hashing and confirmed by cosine similarity.
+
+The cache is shared by every thread in the process, so callers only use it
+for a thread's first question; later answers depend on the thread's history.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.settings import settings
+
+
+class RandomProjectionLSH:
+    """
+    Locality sensitive hash index over unit-normalized embedding vectors.
+
+    Each table hashes a vector to the sign pattern of its projections onto a
+    set of random hyperplanes. Vectors sharing a bucket in any table become
+    candidates, which are then ranked by exact cosine similarity.
+    """
+
+    def __init__(
+        self,
+        dim: int = 1536,
+        n_planes: int = 12,
+        n_tables: int = 8,
+        maxsize: int = 2048,
+        seed: int = 0
+    ) -> None:
+        """
+        Initialize the LSH index.
+
+        Args:
+            dim: Dimensionality of the embedding vectors
+            n_planes: Number of hyperplanes (hash bits) per table
+            n_tables: Number of independent hash tables
+            maxsize: Maximum number of cached answers before eviction
+            seed: Seed for the random hyperplanes
+        """
+        rng = np.random.default_rng(seed)
+        self.maxsize = maxsize
+        self._planes = rng.standard_normal((n_tables, n_planes, dim)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(n_planes, dtype=np.int64)
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(n_tables)]
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, str, List[int]]]" = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _bucket_keys(self, unit_vector: np.ndarray) -> List[int]:
+        bits = (self._planes @ unit_vector) > 0
+        return (bits @ self._bit_weights).tolist()
+
+    def probe(self, vector: Sequence[float], threshold: float = 0.95) -> Optional[str]:
+        """
+        Find the cached answer for the most similar previous query.
+
+        Args:
+            vector: Embedding of the incoming query
+            threshold: Minimum cosine similarity for a hit
+
+        Returns:
+            The cached answer, or None if no candidate is similar enough
+        """
+        unit_vector = self._normalize(vector)
+
+        candidate_ids: Set[int] = set()
+        for table, key in zip(self._tables, self._bucket_keys(unit_vector)):
+            candidate_ids.update(table.get(key, ()))
+
+        best_id, best_score = None, threshold
+        for entry_id in candidate_ids:
+            score = float(self._entries[entry_id][0] @ unit_vector)
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            return None
+
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id][1]
+
+    def insert(self, vector: Sequence[float], answer: str) -> None:
+        """
+        Cache an answer under the embedding of the query that produced it.
+
+        Args:
+            vector: Embedding of the query
+            answer: Generated answer to serve for similar queries
+        """
+        unit_vector = self._normalize(vector)
+        keys = self._bucket_keys(unit_vector)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (unit_vector, answer, keys)
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, set()).add(entry_id)
+
+        if len(self._entries) > self.maxsize:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry_id, (_, _, keys) = self._entries.popitem(last=False)
+        for table, key in zip(self._tables, keys):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global cache instance shared by chat endpoints
+semantic_cache = RandomProjectionLSH(
+    dim=settings.vector_dim,
+    maxsize=settings.semantic_cache_size
+)
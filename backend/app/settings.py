@@ -17,13 +17,55 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     model_name: str = Field(default="gpt-4o-mini", env="MODEL_NAME")
+    llm_base_url: Optional[str] = Field(default=None, env="LLM_BASE_URL")
     vector_dim: int = Field(default=1536, env="VECTOR_DIM")
+    embedding_model: str = Field(default="text-embedding-3-small", env="EMBEDDING_MODEL")
+    embeddings_backend: str = Field(default="openai", env="EMBEDDINGS_BACKEND")
+    local_embedding_model: str = Field(default="BAAI/bge-small-en-v1.5", env="LOCAL_EMBEDDING_MODEL")
+    embedding_cache_size: int = Field(default=4096, env="EMBEDDING_CACHE_SIZE")
+    embedding_batch_size: int = Field(default=64, env="EMBEDDING_BATCH_SIZE")
+    embedding_batch_latency_ms: int = Field(default=15, env="EMBEDDING_BATCH_LATENCY_MS")
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_size: int = Field(default=2048, env="SEMANTIC_CACHE_SIZE")
+    semantic_cache_probe_timeout_ms: int = Field(default=200, env="SEMANTIC_CACHE_PROBE_TIMEOUT_MS")
+    chain_cache_size: int = Field(default=32, env="CHAIN_CACHE_SIZE")
+    chain_cache_ttl_seconds: int = Field(default=600, env="CHAIN_CACHE_TTL_SECONDS")
+    
+    # Outbound HTTP Configuration
+    http_timeout_seconds: float = Field(default=60.0, env="HTTP_TIMEOUT_SECONDS")
+    http_max_connections: int = Field(default=100, env="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(
+        default=50,
+        env="HTTP_MAX_KEEPALIVE_CONNECTIONS"
+    )
     
     # Database Configuration
     database_url: str = Field(..., env="DATABASE_URL")
+    db_pool_size: int = Field(default=20, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=40, env="DB_MAX_OVERFLOW")
+    db_pool_recycle_seconds: int = Field(default=1800, env="DB_POOL_RECYCLE_SECONDS")
+    db_pool_timeout_seconds: int = Field(default=30, env="DB_POOL_TIMEOUT_SECONDS")
+    db_connect_timeout_seconds: int = Field(default=10, env="DB_CONNECT_TIMEOUT_SECONDS")
+    db_tcp_keepalive_idle_seconds: int = Field(default=30, env="DB_TCP_KEEPALIVE_IDLE_SECONDS")
+    asyncpg_pool_min_size: int = Field(default=2, env="ASYNCPG_POOL_MIN_SIZE")
+    asyncpg_pool_max_size: int = Field(default=10, env="ASYNCPG_POOL_MAX_SIZE")
+    vector_index_maintenance_work_mem: str = Field(
+        default="2GB", env="VECTOR_INDEX_MAINTENANCE_WORK_MEM"
+    )
+    vector_index_parallel_workers: int = Field(default=7, env="VECTOR_INDEX_PARALLEL_WORKERS")
+    
+    # Ingestion Configuration
+    ingestion_workers: Optional[int] = Field(default=None, env="INGESTION_WORKERS")
+    ingestion_job_workers: int = Field(default=2, env="INGESTION_JOB_WORKERS")
+    
+    # Assessment State Configuration
+    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
+    assessment_ttl_seconds: int = Field(default=3600, env="ASSESSMENT_TTL_SECONDS")
+    max_active_assessments: int = Field(default=10000, env="MAX_ACTIVE_ASSESSMENTS")
     
     # API Configuration
     debug: bool = Field(default=False, env="DEBUG")
+    server_workers: int = Field(default=1, env="SERVER_WORKERS")
     secret_key: str = Field(default="dev-secret-key", env="SECRET_KEY")
     allowed_hosts: str = Field(
         default="localhost,127.0.0.1,*", 
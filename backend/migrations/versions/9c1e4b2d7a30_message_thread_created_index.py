@@ -0,0 +1,38 @@
+"""Message thread and created_at index
+
+Revision ID: 9c1e4b2d7a30
+Revises: 5374a889b6fe
+Create Date: 2026-10-15 10:12:41.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e4b2d7a30'
+down_revision = '5374a889b6fe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so messages stay writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_thread_created',
+            'messages',
+            ['thread_id', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_thread_created',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
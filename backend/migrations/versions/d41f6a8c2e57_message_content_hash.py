@@ -0,0 +1,42 @@
+"""Message content hash for embedding reuse
+
+Revision ID: d41f6a8c2e57
+Revises: 9c1e4b2d7a30
+Create Date: 2026-10-15 23:18:06.552817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f6a8c2e57'
+down_revision = '9c1e4b2d7a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('content_hash', sa.LargeBinary(), nullable=True))
+
+    # Built concurrently so messages stay writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_content_hash',
+            'messages',
+            ['content_hash'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_content_hash',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.drop_column('messages', 'content_hash')
@@ -0,0 +1,169 @@
+"""
+Tests for the Redis-backed assessment store.
+"""
+
+from uuid import uuid4
+
+import pytest
+from redis.exceptions import WatchError
+
+from app.prompts import AssessmentData, assessment_manager
+from app.services.assessment_store import (
+    ASSESSMENT_KEY_PREFIX,
+    ASSESSMENT_UPDATE_ATTEMPTS,
+    AssessmentConflictError,
+    AssessmentStore,
+)
+from app.settings import settings
+
+
+class FakeRedis:
+    """Key-value store with per-key versions for WATCH/MULTI semantics."""
+
+    def __init__(self):
+        self.values = {}
+        self.versions = {}
+
+    def write(self, key, value):
+        self.values[key] = value
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.watched = {}
+        self.queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def watch(self, key):
+        self.watched[key] = self.redis.versions.get(key, 0)
+
+    async def get(self, key):
+        return self.redis.values.get(key)
+
+    def multi(self):
+        self.queued = []
+
+    def set(self, key, value, ex=None):
+        self.queued.append((key, value))
+
+    async def execute(self):
+        try:
+            for key, version in self.watched.items():
+                if self.redis.versions.get(key, 0) != version:
+                    raise WatchError(f"Watched variable {key} changed")
+            for key, value in self.queued:
+                self.redis.write(key, value)
+        finally:
+            self.watched, self.queued = {}, []
+
+
+@pytest.fixture
+def store():
+    store = AssessmentStore()
+    store._redis = FakeRedis()
+    store._watch_error = WatchError
+    return store
+
+
+def stored_assessment(store, session_id):
+    return AssessmentData.from_json(store._redis.values[ASSESSMENT_KEY_PREFIX + session_id])
+
+
+async def test_update_writes_new_session(store):
+    session_id = str(uuid4())
+
+    await store.update(
+        session_id,
+        lambda: assessment_manager.start_assessment("user", session_id, "sore knee")
+    )
+
+    assert stored_assessment(store, session_id).extracted_data == {"initial_complaint": "sore knee"}
+
+
+async def test_concurrent_write_is_retried_on_fresh_copy(store):
+    session_id = str(uuid4())
+    key = ASSESSMENT_KEY_PREFIX + session_id
+    other = assessment_manager.start_assessment("user", session_id, "sore knee")
+    store._redis.write(key, other.to_json())
+    calls = []
+
+    def mutate():
+        assessment = assessment_manager.active_assessments.get(session_id)
+        if not calls:
+            # Another worker saves the session between our read and write
+            concurrent = AssessmentData.from_json(other.to_json())
+            concurrent.extracted_data["swelling"] = True
+            store._redis.write(key, concurrent.to_json())
+        calls.append(dict(assessment.extracted_data))
+        assessment.extracted_data["pain_level"] = 6
+
+    await store.update(session_id, mutate)
+
+    assert len(calls) == 2
+    assert stored_assessment(store, session_id).extracted_data == {
+        "initial_complaint": "sore knee",
+        "swelling": True,
+        "pain_level": 6,
+    }
+
+
+async def test_update_gives_up_after_repeated_conflicts(store):
+    session_id = str(uuid4())
+    key = ASSESSMENT_KEY_PREFIX + session_id
+    calls = []
+
+    def mutate():
+        calls.append(True)
+        assessment = assessment_manager.start_assessment("user", session_id)
+        store._redis.write(key, assessment.to_json())
+
+    with pytest.raises(AssessmentConflictError):
+        await store.update(session_id, mutate)
+
+    assert len(calls) == ASSESSMENT_UPDATE_ATTEMPTS
+
+
+async def test_update_without_redis_runs_in_process():
+    store = AssessmentStore()
+
+    assert await store.update(str(uuid4()), lambda: "done") == "done"
+
+
+async def test_load_drops_local_copy_expired_in_redis(store):
+    session_id = str(uuid4())
+    assessment_manager.start_assessment("user", session_id, "sore knee")
+
+    await store.load(session_id)
+
+    assert session_id not in assessment_manager.active_assessments
+
+
+async def test_load_refreshes_local_copy(store):
+    session_id = str(uuid4())
+    shared = assessment_manager.start_assessment("user", session_id, "sore knee")
+    store._redis.write(ASSESSMENT_KEY_PREFIX + session_id, shared.to_json())
+    assessment_manager.start_assessment("user", session_id, "stale copy")
+
+    await store.load(session_id)
+
+    assert assessment_manager.active_assessments.get(session_id).extracted_data == {
+        "initial_complaint": "sore knee"
+    }
+
+
+def test_local_sessions_expire_with_the_store():
+    assert assessment_manager.active_assessments.ttl_seconds == settings.assessment_ttl_seconds
+    assert assessment_manager.active_assessments.maxsize == settings.max_active_assessments
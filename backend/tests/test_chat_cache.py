@@ -0,0 +1,197 @@
+"""
+Tests for semantic cache use in the chat endpoints.
+"""
+
+import asyncio
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.api import chat
+from app.db.core import get_session
+from app.db.models import MessageRole
+from app.main import create_app
+from app.services.semantic_cache import RandomProjectionLSH
+
+
+class FakeResult:
+    def __init__(self, value=None):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    """Session whose threads either all have history or none do."""
+
+    def __init__(self, has_history=False):
+        self.has_history = has_history
+        self.added = []
+        self.committed = False
+
+    async def execute(self, statement, *args, **kwargs):
+        return FakeResult(uuid4() if self.has_history else None)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.committed = True
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeMemory:
+    def __init__(self):
+        self.saved = []
+
+    def save_context(self, inputs, outputs):
+        self.saved.append((inputs["question"], outputs["answer"]))
+
+
+class FakeChain:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+        self.memory = FakeMemory()
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return {"answer": self.answer}
+
+
+@pytest.fixture
+def chat_env(monkeypatch):
+    """Patch the chat module's chain, embeddings and cache with fakes."""
+    env = {
+        "session": FakeSession(),
+        "chain": FakeChain("chain answer"),
+        "embed_calls": 0,
+        "embed_error": None,
+        "embed_delay": 0,
+    }
+
+    async def fake_embed_text(text):
+        env["embed_calls"] += 1
+        await asyncio.sleep(env["embed_delay"])
+        if env["embed_error"] is not None:
+            raise env["embed_error"]
+        return [1.0, 0.5, 0.25, 0.0]
+
+    async def fake_session():
+        yield env["session"]
+
+    monkeypatch.setattr(chat, "embed_text", fake_embed_text)
+    monkeypatch.setattr(chat, "get_chain", lambda thread_id: env["chain"])
+    monkeypatch.setattr(chat, "semantic_cache", RandomProjectionLSH(dim=4, maxsize=16))
+    monkeypatch.setattr(chat, "AsyncSessionLocal", lambda: env["session"])
+
+    app = create_app()
+    app.dependency_overrides[get_session] = fake_session
+    env["app"] = app
+    return env
+
+
+async def post_simple(app, message, thread_id=None):
+    payload = {"message": message}
+    if thread_id is not None:
+        payload["thread_id"] = thread_id
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.post("/chat/simple", json=payload)
+
+
+async def test_first_question_is_served_from_cache_for_new_threads(chat_env):
+    response = await post_simple(chat_env["app"], "my knee hurts")
+    await chat.drain_background_tasks()
+    assert response.json()["response"] == "chain answer"
+
+    chat_env["chain"] = FakeChain("fresh answer")
+    response = await post_simple(chat_env["app"], "my knee hurts")
+    await chat.drain_background_tasks()
+
+    assert response.json()["response"] == "chain answer"
+    assert chat_env["chain"].calls == 0
+    assert chat_env["chain"].memory.saved == [("my knee hurts", "chain answer")]
+
+
+async def test_threads_with_history_bypass_cache(chat_env):
+    await post_simple(chat_env["app"], "yes")
+    await chat.drain_background_tasks()
+
+    chat_env["session"] = FakeSession(has_history=True)
+    chat_env["chain"] = FakeChain("answer for this thread")
+    response = await post_simple(chat_env["app"], "yes", thread_id=str(uuid4()))
+
+    assert response.json()["response"] == "answer for this thread"
+    assert chat_env["chain"].calls == 1
+    assert len(chat.semantic_cache) == 1
+
+
+async def test_embedding_failure_falls_back_to_chain(chat_env):
+    chat_env["embed_error"] = RuntimeError("embeddings unavailable")
+
+    response = await post_simple(chat_env["app"], "my back hurts")
+    await chat.drain_background_tasks()
+
+    assert response.status_code == 200
+    assert response.json()["response"] == "chain answer"
+    assert len(chat.semantic_cache) == 0
+
+
+async def test_slow_embedding_does_not_hold_up_chain(chat_env, monkeypatch):
+    monkeypatch.setattr(chat.settings, "semantic_cache_probe_timeout_ms", 10)
+    chat_env["embed_delay"] = 0.05
+
+    response = await post_simple(chat_env["app"], "my ankle is swollen")
+    assert len(chat.semantic_cache) == 0
+    await chat.drain_background_tasks()
+
+    assert response.json()["response"] == "chain answer"
+    assert chat_env["chain"].calls == 1
+    assert len(chat.semantic_cache) == 1
+
+
+async def test_stream_skips_cache_for_threads_with_history(chat_env, monkeypatch):
+    chat.semantic_cache.insert([1.0, 0.5, 0.25, 0.0], "other patient's answer")
+    chat_env["session"] = FakeSession(has_history=True)
+
+    async def fake_tokens(chain, query):
+        yield "thread answer"
+
+    monkeypatch.setattr(chat, "stream_chain_tokens", fake_tokens)
+    monkeypatch.setattr(chat, "persist_chat_exchange", _noop_persist)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=chat_env["app"]), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/chat/", json={"message": "does it hurt more at night?", "thread_id": str(uuid4())}
+        )
+    await asyncio.sleep(0)
+
+    assert "thread answer" in response.text
+    assert "other patient" not in response.text
+    assert chat_env["embed_calls"] == 0
+
+
+async def _noop_persist(thread_id, query, answer, asked_at):
+    pass
+
+
+async def test_reply_is_stamped_after_question(chat_env):
+    await post_simple(chat_env["app"], "my wrist hurts")
+
+    user_message, assistant_message = chat_env["session"].added
+    assert user_message.role == MessageRole.USER
+    assert assistant_message.created_at > user_message.created_at
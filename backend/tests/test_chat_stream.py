@@ -0,0 +1,107 @@
+"""
+Tests for persisting streamed chat exchanges.
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.api import chat
+from app.db.models import MessageRole
+
+
+@pytest.fixture
+def persisted(monkeypatch):
+    """Record persist_chat_exchange calls instead of writing to the database."""
+    calls = []
+
+    async def fake_persist(thread_id, query, answer, asked_at):
+        calls.append((query, answer))
+
+    monkeypatch.setattr(chat, "persist_chat_exchange", fake_persist)
+    return calls
+
+
+async def tokens_from(*items):
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def test_complete_reply_is_persisted(persisted):
+    stream = chat.stream_chat_response(tokens_from("Hello", " there"), "hi", uuid4())
+    frames = [frame async for frame in stream]
+    await chat.drain_background_tasks()
+
+    assert frames[-1] == chat.SSE_DONE_EVENT
+    assert persisted == [("hi", "Hello there")]
+
+
+async def test_empty_reply_still_persists_user_message(persisted):
+    stream = chat.stream_chat_response(tokens_from(), "hi", uuid4())
+    [frame async for frame in stream]
+    await chat.drain_background_tasks()
+
+    assert persisted == [("hi", "")]
+
+
+async def test_llm_error_persists_partial_reply(persisted):
+    stream = chat.stream_chat_response(
+        tokens_from("Partial", RuntimeError("LLM unavailable")), "hi", uuid4()
+    )
+    frames = []
+    with pytest.raises(RuntimeError):
+        async for frame in stream:
+            frames.append(frame)
+    await chat.drain_background_tasks()
+
+    assert frames[-1].startswith(chat.SSE_ERROR_PREFIX)
+    assert persisted == [("hi", "Partial")]
+
+
+async def test_disconnect_persists_partial_reply(persisted):
+    stream = chat.stream_chat_response(tokens_from("Partial", " reply"), "hi", uuid4())
+    await stream.__anext__()
+    await stream.aclose()
+    await chat.drain_background_tasks()
+
+    assert persisted == [("hi", "Partial")]
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+        self.committed = False
+
+    async def execute(self, statement, *args, **kwargs):
+        pass
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.committed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+async def test_persist_without_reply_stores_user_message(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(chat, "AsyncSessionLocal", lambda: session)
+
+    await chat.persist_chat_exchange(uuid4(), "hi", "", datetime.now(timezone.utc))
+
+    assert session.committed
+    assert [message.role for message in session.added] == [MessageRole.USER]
+
+
+def test_reply_timestamp_orders_after_question():
+    asked_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+
+    assert chat.reply_timestamp(asked_at) == asked_at + chat.REPLY_TIMESTAMP_OFFSET
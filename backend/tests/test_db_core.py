@@ -0,0 +1,58 @@
+"""
+Tests for database connection setup.
+"""
+
+import socket
+
+from app.db import core
+
+
+class FakeSocket:
+    def __init__(self, family=socket.AF_INET):
+        self.family = family
+        self.options = {}
+
+    def setsockopt(self, level, option, value):
+        self.options[(level, option)] = value
+
+
+class FakeTransport:
+    def __init__(self, sock):
+        self.sock = sock
+
+    def get_extra_info(self, name):
+        return self.sock if name == "socket" else None
+
+
+class FakeConnection:
+    def __init__(self, transport=None):
+        if transport is not None:
+            self._transport = transport
+
+
+def test_keepalive_enabled_on_tcp_sockets():
+    sock = FakeSocket()
+
+    core.enable_tcp_keepalive(FakeConnection(FakeTransport(sock)))
+
+    assert sock.options[(socket.SOL_SOCKET, socket.SO_KEEPALIVE)] == 1
+
+
+def test_keepalive_skipped_for_unix_sockets():
+    sock = FakeSocket(family=socket.AF_UNIX)
+
+    core.enable_tcp_keepalive(FakeConnection(FakeTransport(sock)))
+
+    assert sock.options == {}
+
+
+def test_keepalive_skipped_without_driver_transport():
+    core.enable_tcp_keepalive(FakeConnection())
+
+
+def test_server_side_keepalive_is_requested():
+    assert set(core.KEEPALIVE_SERVER_SETTINGS) == {
+        "tcp_keepalives_idle",
+        "tcp_keepalives_interval",
+        "tcp_keepalives_count",
+    }
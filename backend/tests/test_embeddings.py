@@ -0,0 +1,103 @@
+"""
+Tests for the embedding cache and micro-batcher.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services import embeddings as embedding_service
+from app.services.embeddings import EmbeddingBatcher, EmbeddingCache
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeds each text as [len(text)] and records every batched call."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return self.embed_documents(texts)
+
+
+async def test_batcher_coalesces_concurrent_requests_in_order():
+    client = FakeEmbeddings()
+    batcher = EmbeddingBatcher(client, max_batch=8, max_latency=0.01)
+
+    vectors = await asyncio.gather(*(batcher.embed("x" * size) for size in (3, 1, 2)))
+
+    assert vectors == [[3.0], [1.0], [2.0]]
+    assert client.calls == [["xxx", "x", "xx"]]
+
+
+async def test_batcher_flushes_full_batches_immediately():
+    client = FakeEmbeddings()
+    batcher = EmbeddingBatcher(client, max_batch=2, max_latency=10)
+
+    vectors = await asyncio.wait_for(
+        asyncio.gather(*(batcher.embed("x" * size) for size in (1, 2, 3, 4))),
+        timeout=1
+    )
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+    assert client.calls == [["x", "xx"], ["xxx", "xxxx"]]
+
+
+async def test_batcher_fans_errors_out_to_every_request():
+    client = FakeEmbeddings(error=RuntimeError("rate limited"))
+    batcher = EmbeddingBatcher(client, max_batch=8, max_latency=0.01)
+
+    results = await asyncio.gather(
+        batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["rate limited", "rate limited"]
+    assert len(client.calls) == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(maxsize=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+
+    cache.put("c", [3.0])
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+
+def test_cache_key_depends_on_model():
+    assert EmbeddingCache.key("knee", "model-a") != EmbeddingCache.key("knee", "model-b")
+    assert EmbeddingCache.key("knee", "model-a") == EmbeddingCache.key("knee", "model-a")
+
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    client = FakeEmbeddings()
+    monkeypatch.setattr(embedding_service, "embeddings", client)
+    monkeypatch.setattr(embedding_service, "embedding_cache", EmbeddingCache(maxsize=16))
+    return client
+
+
+async def test_embed_texts_embeds_each_distinct_miss_once(fake_service):
+    await embedding_service.embed_texts(["aa"])
+
+    vectors = await embedding_service.embed_texts(["aa", "bbb", "bbb", "c"])
+
+    assert vectors == [[2.0], [3.0], [3.0], [1.0]]
+    assert fake_service.calls == [["aa"], ["bbb", "c"]]
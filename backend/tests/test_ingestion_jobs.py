@@ -0,0 +1,158 @@
+"""
+Tests for background document ingestion jobs.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.api import ingestion
+from app.api.auth import verify_token
+from app.main import create_app
+from app.services.ingestion_jobs import IngestionJobQueue
+
+
+class FakeIngestionService:
+    """Ingestion service that waits for a release and then succeeds or fails."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.ingested = []
+
+    async def ingest_document(self, file_path, source_type, executor=None):
+        await self.release.wait()
+        self.ingested.append((file_path.read_text(), source_type))
+        if source_type == "broken":
+            raise ValueError("unreadable document")
+        return ["message-1", "message-2"]
+
+
+@pytest.fixture
+async def job_env(tmp_path):
+    queue = IngestionJobQueue()
+    service = FakeIngestionService()
+
+    async def get_service():
+        return service
+
+    queue.start(get_service)
+    yield queue, service, tmp_path
+    await queue.stop()
+
+
+def make_upload(tmp_path, name, content="knee pain guidance"):
+    upload_dir = tmp_path / name
+    upload_dir.mkdir()
+    (upload_dir / f"{name}.txt").write_text(content)
+    return upload_dir, f"{name}.txt"
+
+
+async def wait_for_status(queue, job_id, status):
+    for _ in range(100):
+        if queue.get(job_id).status == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} never reached {status}")
+
+
+async def test_job_lifecycle_completes_and_removes_upload(job_env):
+    queue, service, tmp_path = job_env
+    upload_dir, filename = make_upload(tmp_path, "guide")
+
+    job = queue.submit(upload_dir, filename, "knowledge_base")
+    assert job.status == "queued"
+
+    await wait_for_status(queue, job.id, "running")
+    service.release.set()
+    await wait_for_status(queue, job.id, "completed")
+
+    assert job.message_ids == ["message-1", "message-2"]
+    assert job.error is None
+    assert job.finished_at is not None
+    assert service.ingested == [("knee pain guidance", "knowledge_base")]
+    assert not upload_dir.exists()
+
+
+async def test_failed_job_reports_error_and_removes_upload(job_env):
+    queue, service, tmp_path = job_env
+    service.release.set()
+    upload_dir, filename = make_upload(tmp_path, "broken")
+
+    job = queue.submit(upload_dir, filename, "broken")
+    await wait_for_status(queue, job.id, "failed")
+
+    assert job.error == "unreadable document"
+    assert job.message_ids == []
+    assert not upload_dir.exists()
+
+
+async def test_only_finished_jobs_are_evicted(tmp_path):
+    queue = IngestionJobQueue(max_jobs=2)
+    first = queue.submit(*make_upload(tmp_path, "first"), "knowledge_base")
+    first.status = "completed"
+    second = queue.submit(*make_upload(tmp_path, "second"), "knowledge_base")
+    third = queue.submit(*make_upload(tmp_path, "third"), "knowledge_base")
+
+    assert queue.get(first.id) is None
+    assert queue.get(second.id) is second
+    assert queue.get(third.id) is third
+
+    # Queued jobs are kept even beyond max_jobs so their result is not lost
+    fourth = queue.submit(*make_upload(tmp_path, "fourth"), "knowledge_base")
+    assert queue.get(second.id) is second
+    assert queue.get(fourth.id) is fourth
+
+
+async def test_job_status_endpoint(job_env, monkeypatch):
+    queue, service, tmp_path = job_env
+    service.release.set()
+    monkeypatch.setattr(ingestion, "ingestion_jobs", queue)
+
+    app = create_app()
+    app.dependency_overrides[verify_token] = lambda: "test-user"
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/ingestion/upload-document",
+            files={"file": ("guide.txt", b"ankle sprain guidance", "text/plain")}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        await wait_for_status(queue, job_id, "completed")
+        response = await client.get(f"/ingestion/jobs/{job_id}")
+        missing = await client.get("/ingestion/jobs/unknown")
+
+    assert response.json() == {
+        "job_id": job_id,
+        "status": "completed",
+        "filename": "guide.txt",
+        "message_ids": ["message-1", "message-2"],
+        "chunks_created": 2,
+        "error": None,
+    }
+    assert missing.status_code == 404
+
+
+async def test_stop_removes_uploads_of_pending_jobs(tmp_path):
+    queue = IngestionJobQueue()
+    service = FakeIngestionService()
+
+    async def get_service():
+        return service
+
+    queue.start(get_service)
+    running_dir, running_name = make_upload(tmp_path, "running")
+    pending_dir, pending_name = make_upload(tmp_path, "pending")
+    running = queue.submit(running_dir, running_name, "knowledge_base")
+    pending = queue.submit(pending_dir, pending_name, "knowledge_base")
+    await wait_for_status(queue, running.id, "running")
+
+    await queue.stop()
+
+    assert pending.status == "failed"
+    assert not pending_dir.exists()
+    assert not running_dir.exists()
@@ -0,0 +1,68 @@
+"""
+Tests for the semantic response cache.
+"""
+
+import numpy as np
+
+from app.services.semantic_cache import RandomProjectionLSH
+
+
+def vector_at_similarity(base, similarity, seed=1):
+    """Build a vector with the given cosine similarity to base."""
+    base = np.asarray(base, dtype=np.float64)
+    base = base / np.linalg.norm(base)
+    noise = np.random.default_rng(seed).standard_normal(base.shape)
+    orthogonal = noise - (noise @ base) * base
+    orthogonal /= np.linalg.norm(orthogonal)
+    return (similarity * base + np.sqrt(1 - similarity ** 2) * orthogonal).tolist()
+
+
+BASE = np.random.default_rng(0).standard_normal(64).tolist()
+
+
+def test_identical_query_hits():
+    cache = RandomProjectionLSH(dim=64)
+    cache.insert(BASE, "rest and ice")
+
+    assert cache.probe(BASE, threshold=0.95) == "rest and ice"
+
+
+def test_scaled_query_hits():
+    cache = RandomProjectionLSH(dim=64)
+    cache.insert(BASE, "rest and ice")
+
+    assert cache.probe([value * 3 for value in BASE], threshold=0.95) == "rest and ice"
+
+
+def test_similarity_threshold():
+    cache = RandomProjectionLSH(dim=64, n_planes=4, n_tables=16)
+    cache.insert(BASE, "rest and ice")
+    near = vector_at_similarity(BASE, 0.97)
+    far = vector_at_similarity(BASE, 0.9)
+
+    assert cache.probe(near, threshold=0.96) == "rest and ice"
+    assert cache.probe(near, threshold=0.98) is None
+    assert cache.probe(far, threshold=0.95) is None
+
+
+def test_unrelated_query_misses():
+    cache = RandomProjectionLSH(dim=64)
+    cache.insert(BASE, "rest and ice")
+
+    assert cache.probe([-value for value in BASE], threshold=0.5) is None
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = RandomProjectionLSH(dim=64, maxsize=2)
+    vectors = [np.random.default_rng(seed).standard_normal(64).tolist() for seed in (1, 2, 3)]
+    cache.insert(vectors[0], "first")
+    cache.insert(vectors[1], "second")
+
+    # A hit marks the first answer as recently used
+    assert cache.probe(vectors[0]) == "first"
+    cache.insert(vectors[2], "third")
+
+    assert len(cache) == 2
+    assert cache.probe(vectors[0]) == "first"
+    assert cache.probe(vectors[1]) is None
+    assert cache.probe(vectors[2]) == "third"
@@ -0,0 +1,147 @@
+"""
+Tests for the mobile sync endpoint.
+"""
+
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Delete, Insert, Select
+
+from app.api import sync
+from app.db.core import get_session
+from app.db.models import Embedding, Message, Thread
+from app.main import create_app
+
+
+class FakeScalars:
+    def __init__(self, values):
+        self.values = values
+
+    def all(self):
+        return list(self.values)
+
+
+class FakeResult:
+    def __init__(self, values=(), rowcount=0):
+        self.values = values
+        self.rowcount = rowcount
+
+    def scalars(self):
+        return FakeScalars(self.values)
+
+
+class FakeSession:
+    """Session that tracks upserted rows per table and commits them on commit."""
+
+    def __init__(self, thread_ids=()):
+        self.thread_ids = set(thread_ids)
+        self.pending = {Thread.__tablename__: set(), Message.__tablename__: set()}
+        self.committed = {Thread.__tablename__: set(), Message.__tablename__: set()}
+
+    async def execute(self, statement, *args, **kwargs):
+        if isinstance(statement, Select):
+            return FakeResult(self.thread_ids | self.pending[Thread.__tablename__])
+        if isinstance(statement, Insert):
+            table = statement.table.name
+            if table == Embedding.__tablename__:
+                return FakeResult()
+            params = statement.compile(dialect=postgresql.dialect()).params
+            ids = {value for key, value in params.items() if key.startswith("id_m")}
+            if table == Message.__tablename__:
+                known = self.thread_ids | self.pending[Thread.__tablename__]
+                thread_ids = {
+                    value for key, value in params.items() if key.startswith("thread_id_m")
+                }
+                if not thread_ids <= known:
+                    raise RuntimeError("foreign key violation on messages.thread_id")
+            self.pending[table] |= ids
+            return FakeResult()
+        if isinstance(statement, Delete):
+            return FakeResult(rowcount=0)
+        raise AssertionError(f"Unexpected statement {statement!r}")
+
+    async def commit(self):
+        for table, ids in self.pending.items():
+            self.committed[table] |= ids
+
+
+@pytest.fixture
+def sync_env(monkeypatch):
+    env = {"session": FakeSession()}
+
+    async def fake_embed_texts(texts):
+        return [[0.0, 1.0] for _ in texts]
+
+    async def fake_session():
+        yield env["session"]
+
+    monkeypatch.setattr(sync, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(sync, "verify_auth_token", lambda request: True)
+
+    app = create_app()
+    app.dependency_overrides[get_session] = fake_session
+    env["app"] = app
+    return env
+
+
+def message_delta(thread_id, content="hello"):
+    return {
+        "id": str(uuid4()),
+        "thread_id": str(thread_id),
+        "role": "USER",
+        "content": content,
+        "operation": "insert",
+    }
+
+
+async def post_sync(app, threads=(), messages=()):
+    payload = {
+        "threads": list(threads),
+        "messages": list(messages),
+        "client_id": "test-client",
+        "sync_timestamp": 0,
+    }
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.post("/sync/", json=payload)
+
+
+async def test_bad_message_delta_does_not_fail_good_ones(sync_env):
+    existing_thread = uuid4()
+    new_thread = uuid4()
+    sync_env["session"] = FakeSession(thread_ids=[existing_thread])
+
+    good = [message_delta(existing_thread), message_delta(new_thread)]
+    bad = message_delta(uuid4())
+    response = await post_sync(
+        sync_env["app"],
+        threads=[{"id": str(new_thread), "title": "New", "operation": "insert"}],
+        messages=[good[0], bad, good[1]],
+    )
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["success"] is False
+    assert body["synced_threads"] == 1
+    assert body["synced_messages"] == 2
+    assert len(body["errors"]) == 1
+    assert bad["id"] in body["errors"][0]
+
+    committed = {str(message_id) for message_id in sync_env["session"].committed["messages"]}
+    assert committed == {good[0]["id"], good[1]["id"]}
+
+
+async def test_invalid_role_is_reported(sync_env):
+    thread_id = uuid4()
+    sync_env["session"] = FakeSession(thread_ids=[thread_id])
+    delta = message_delta(thread_id)
+    delta["role"] = "robot"
+
+    response = await post_sync(sync_env["app"], messages=[delta, message_delta(thread_id)])
+
+    body = response.json()
+    assert body["synced_messages"] == 1
+    assert body["errors"] == [f"Message {delta['id']}: Invalid role 'robot'"]
@@ -0,0 +1,60 @@
+"""
+Tests for the startup vector index build.
+"""
+
+import pytest
+
+from app.db import vector
+
+
+class FakeConnection:
+    """Connection that records statements and answers lock and validity checks."""
+
+    def __init__(self, lock_available=True, invalid_index=False):
+        self.lock_available = lock_available
+        self.invalid_index = invalid_index
+        self.statements = []
+
+    async def fetchval(self, query, *args):
+        self.statements.append(query)
+        if "pg_try_advisory_lock" in query:
+            return self.lock_available
+        return 1 if self.invalid_index else None
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+
+    def ran(self, fragment):
+        return any(fragment in statement for statement in self.statements)
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    def use(connection):
+        async def fake_get_asyncpg_connection():
+            yield connection
+
+        monkeypatch.setattr(vector, "get_asyncpg_connection", fake_get_asyncpg_connection)
+        return connection
+
+    return use
+
+
+async def test_build_is_skipped_while_another_process_holds_the_lock(connect):
+    connection = connect(FakeConnection(lock_available=False, invalid_index=True))
+
+    await vector.create_vector_index()
+
+    assert not connection.ran("DROP INDEX")
+    assert not connection.ran("CREATE INDEX")
+    assert not connection.ran("maintenance_work_mem")
+
+
+async def test_invalid_index_is_rebuilt_under_the_lock(connect):
+    connection = connect(FakeConnection(invalid_index=True))
+
+    await vector.create_vector_index()
+
+    assert connection.ran("DROP INDEX CONCURRENTLY")
+    assert connection.ran("CREATE INDEX CONCURRENTLY")
+    assert "pg_advisory_unlock" in connection.statements[-1]